@@ -0,0 +1,129 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Teste de carga do serviço HTTP local (python thunder_csv.py servico).
+# Sem --porta, sobe um serviço temporário em uma porta livre e o encerra no final.
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def gerar_arquivos(pasta: str, quantidade: int, linhas: int) -> list:
+    rng = np.random.default_rng(42)
+    caminhos = []
+    for i in range(quantidade):
+        caminho = os.path.join(pasta, f"carga_{i}.csv")
+        pd.DataFrame({
+            "valor": rng.normal(100, 20, linhas),
+            "quantidade": rng.integers(1, 50, linhas)
+        }).to_csv(caminho, index=False)
+        caminhos.append(caminho)
+    return caminhos
+
+def esperar_servico(porta: int, timeout: float = 30.0):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+            conexao.request("GET", "/saude")
+            if conexao.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("O serviço não respondeu a tempo.")
+
+def requisitar(porta: int, tipo: str, caminho: str) -> tuple:
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=120)
+    inicio = time.perf_counter()
+    if tipo == "caminho":
+        corpo = json.dumps({"caminho": caminho, "colunas": ["valor", "quantidade"], "metodo": "IQR"})
+        conexao.request("POST", "/analisar", body=corpo, headers={"Content-Type": "application/json"})
+    else:
+        with open(caminho, "rb") as f:
+            conexao.request("POST", "/analisar?colunas=valor,quantidade&metodo=IQR", body=f,
+                            headers={"Content-Type": "text/csv", "Content-Length": str(os.path.getsize(caminho))})
+    resposta = conexao.getresponse()
+    dados = json.loads(resposta.read())
+    conexao.close()
+    return tipo, resposta.status, time.perf_counter() - inicio, dados
+
+def percentis(latencias: list) -> str:
+    if not latencias:
+        return "sem requisições"
+    p50, p90, p99 = np.percentile(np.array(latencias) * 1000, [50, 90, 99])
+    return f"p50 {p50:.1f} ms | p90 {p90:.1f} ms | p99 {p99:.1f} ms | máx {max(latencias) * 1000:.1f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço HTTP do ThunderCSV.")
+    parser.add_argument("--porta", type=int, help="Usa um serviço já em execução nesta porta")
+    parser.add_argument("--requisicoes", type=int, default=500)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--arquivos", type=int, default=4)
+    parser.add_argument("--linhas", type=int, default=50_000)
+    parser.add_argument("--proporcao-upload", type=float, default=0.3)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="thundercsv_carga_")
+    caminhos = gerar_arquivos(pasta, args.arquivos, args.linhas)
+    # Cache isolado: a primeira requisição de cada arquivo é de fato uma análise
+    ambiente = {**os.environ, "HOME": pasta}
+
+    servico = None
+    porta = args.porta
+    if porta is None:
+        porta = porta_livre()
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thunder_csv.py")
+        servico = subprocess.Popen([sys.executable, script, "servico", str(porta)], env=ambiente,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_servico(porta)
+        rng = np.random.default_rng(0)
+        pedidos = [
+            ("upload" if rng.random() < args.proporcao_upload else "caminho", caminhos[rng.integers(len(caminhos))])
+            for _ in range(args.requisicoes)
+        ]
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+            resultados = list(executor.map(lambda pedido: requisitar(porta, *pedido), pedidos))
+        duracao = time.perf_counter() - inicio
+
+        erros = [r for r in resultados if r[1] != 200]
+        print(f"\n{args.requisicoes} requisições, concorrência {args.concorrencia}, {args.arquivos} arquivos de {args.linhas} linhas")
+        print(f"Vazão: {args.requisicoes / duracao:.1f} req/s em {duracao:.2f}s ({len(erros)} erros)")
+        print(f"Todas:   {percentis([r[2] for r in resultados])}")
+        for tipo in ("caminho", "upload"):
+            print(f"{tipo.capitalize():8} {percentis([r[2] for r in resultados if r[0] == tipo])}")
+
+        # Uploads e caminhos do mesmo arquivo devem produzir a mesma resposta
+        por_chave = {}
+        for _, status, _, dados in resultados:
+            if status == 200:
+                por_chave.setdefault(dados["chave"], set()).add(json.dumps(dados["outliers"], sort_keys=True))
+        assert all(len(respostas) == 1 for respostas in por_chave.values()), "Respostas divergentes para o mesmo conteúdo"
+
+        conexao = http.client.HTTPConnection("127.0.0.1", porta)
+        conexao.request("GET", next(r[3]["flags"] for r in resultados if r[1] == 200))
+        flags = conexao.getresponse().read().decode("utf-8").splitlines()
+        assert len(flags) == args.linhas + 1, "Arquivo de flags com número de linhas incorreto"
+        conexao.request("GET", "/metricas")
+        print(f"Métricas do serviço: {json.loads(conexao.getresponse().read())}")
+    finally:
+        if servico is not None:
+            servico.terminate()
+            servico.wait()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
 import pandas as pd
 import numpy as np
 import time
+import sys
+import os
+import tempfile
+import contextlib
+import io
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
-from thunder_csv import detectar_outliers 
+from thunder_csv import (detectar_outliers, BACKENDS, backends_disponiveis, dividir_em_chunks, processar_particionado,
+                         carregar_arquivo_csv, otimizar_tipos, validar_estrutura_dados, filtrar_colunas,
+                         calcular_limites_outliers, funcao_processamento_outliers, processar_em_threads,
+                         processar_em_processos, calcular_estatisticas, executar_pipeline, processar_lote,
+                         processar_incremental)
+import json
 
 def gerar_dataframe_teste(linhas: int, colunas: int) -> pd.DataFrame:
     dados = {f"col{i}": np.random.normal(100, 20, linhas) for i in range(colunas)}
@@ -15,24 +26,16 @@ def processar_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
         _ = chunk[col].apply(lambda x: np.sqrt(x ** 2 + 1))  # Simulação de carga, forçar processamento pesado
     return resultado
 
-def dividir_em_chunks(df: pd.DataFrame, n_chunks: int):
-    tamanho = len(df) // n_chunks
-    return [df.iloc[i:i + tamanho] for i in range(0, len(df), tamanho)]
-
 def sequencial(df: pd.DataFrame):
     return processar_chunk(df)
 
 def multithreading(df: pd.DataFrame, n_threads=4):
-    chunks = dividir_em_chunks(df, n_threads)
     with ThreadPoolExecutor(max_workers=n_threads) as executor:
-        resultados = list(executor.map(processar_chunk, chunks))
-    return pd.concat(resultados)
+        return processar_particionado(df, processar_chunk, executor, n_threads, "threads")
 
 def multiprocessing_mode(df: pd.DataFrame, n_processes=4):
-    chunks = dividir_em_chunks(df, n_processes)
     with ProcessPoolExecutor(max_workers=n_processes) as executor:
-        resultados = list(executor.map(processar_chunk, chunks))
-    return pd.concat(resultados)
+        return processar_particionado(df, processar_chunk, executor, n_processes, "processos")
 
 def testar_tempo(funcao, *args):
     inicio = time.perf_counter()
@@ -53,6 +56,243 @@ def executar_teste(nome: str, df: pd.DataFrame):
         tempo_proc, _ = testar_tempo(multiprocessing_mode, df, n)
         print(f"[Multiprocessing ({n} processos)] Tempo: {tempo_proc:.2f}s")
 
+def gerar_fixtures_equivalencia(pasta: str) -> list:
+    """
+    Gera CSVs de teste para comparar backends: dados normais, inteiros com outliers fortes,
+    valores inválidos/nulos e uma coluna constante.
+    """
+    rng = np.random.default_rng(42)
+    caminhos = []
+
+    df = gerar_dataframe_teste(linhas=20_000, colunas=3)
+    caminhos.append(os.path.join(pasta, "normal.csv"))
+    df.to_csv(caminhos[-1], index=False)
+
+    inteiros = pd.DataFrame({"col0": rng.integers(1, 100, 10_000), "col1": rng.integers(-5, 5, 10_000)})
+    inteiros.loc[::500, "col0"] = 10_000
+    caminhos.append(os.path.join(pasta, "inteiros.csv"))
+    inteiros.to_csv(caminhos[-1], index=False)
+
+    sujo = pd.DataFrame({"col0": rng.normal(0, 1, 5_000).astype(object), "col1": rng.normal(10, 2, 5_000)})
+    sujo.loc[::97, "col0"] = "abc"
+    sujo.loc[::89, "col1"] = np.nan
+    caminhos.append(os.path.join(pasta, "sujo.csv"))
+    sujo.to_csv(caminhos[-1], index=False)
+
+    constante = pd.DataFrame({"col0": np.full(1_000, 7.0), "col1": rng.normal(0, 1, 1_000)})
+    caminhos.append(os.path.join(pasta, "constante.csv"))
+    constante.to_csv(caminhos[-1], index=False)
+
+    # Valores representáveis em float32: somas e limites precisam continuar em float64
+    meios = pd.DataFrame({"col0": rng.integers(8_000, 12_000, 300_000) * 0.5, "col1": rng.integers(0, 2_000, 300_000) * 0.25})
+    meios.loc[::1_000, "col0"] = 90_000.5
+    caminhos.append(os.path.join(pasta, "meios.csv"))
+    meios.to_csv(caminhos[-1], index=False)
+
+    # Acima de 50 mil linhas o caminho pandas processa em threads
+    medio = gerar_dataframe_teste(linhas=80_000, colunas=2)
+    caminhos.append(os.path.join(pasta, "medio.csv"))
+    medio.to_csv(caminhos[-1], index=False)
+
+    return caminhos
+
+def referencia_pandas(caminho: str, colunas: list, metodo: str) -> dict | None:
+    """
+    Resultado do caminho pandas real de executar_pipeline (carregar, otimizar_tipos, validar,
+    filtrar e marcar em threads/processos), no formato dos backends e com as marcações em "flags".
+    Retorna None quando a validação interrompe o pipeline.
+    """
+    df = carregar_arquivo_csv(caminho)
+    df, _ = otimizar_tipos(df, colunas)
+    valido, df, _ = validar_estrutura_dados(df, colunas, interromper_em_erro=True)
+    if not valido:
+        return None
+    df = filtrar_colunas(df, colunas)
+
+    limites = {col: calcular_limites_outliers(df[col], metodo) for col in colunas}
+    funcao = partial(funcao_processamento_outliers, metodo=metodo, colunas=colunas, limites=limites)
+    if len(df) < 50_000:
+        df = processar_em_threads(df, funcao, n_threads=1)
+    elif len(df) < 500_000:
+        df = processar_em_threads(df, funcao, n_threads=4)
+    else:
+        df = processar_em_processos(df, funcao, n_chunks=4)
+
+    flags = df[[f"{c}_outlier" for c in colunas]]
+    quantidades = {c: int(flags[f"{c}_outlier"].sum()) for c in colunas}
+    return {
+        "linhas": len(df),
+        "limites": limites,
+        "estatisticas": calcular_estatisticas(df[colunas]),
+        "outliers": {c: {"quantidade_outliers": q, "percentual_outliers": round(q / len(df) * 100, 2) if len(df) else 0.0}
+                     for c, q in quantidades.items()},
+        "flags": flags.astype(str).reset_index(drop=True)
+    }
+
+def testar_equivalencia_backends():
+    """
+    Confere que todos os backends instalados produzem as mesmas marcações de outlier, limites e
+    estatísticas que o caminho pandas de executar_pipeline, para IQR e Z-Score. Arquivos que o
+    caminho pandas recusa na validação também precisam ser recusados com os outros backends.
+    """
+    backends = backends_disponiveis()
+    print(f"\n==== Equivalência entre backends ({', '.join(backends)}) ====")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for caminho in gerar_fixtures_equivalencia(pasta):
+            colunas = ["col0", "col1"]
+            for metodo in ["IQR", "Z-Score"]:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ref = referencia_pandas(caminho, colunas, metodo)
+
+                for backend in backends[1:]:
+                    if ref is None:
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            stats = executar_pipeline(caminho, pasta, colunas, metodo, {"csv": True}, {},
+                                                      usar_cache=False, backend=backend)
+                        assert stats is None, f"Arquivo inválido aceito: {backend}, {caminho}, {metodo}"
+                        continue
+
+                    saida = os.path.join(pasta, f"{backend}.csv")
+                    res = BACKENDS[backend](caminho, colunas, metodo, saida)
+                    flags = pd.read_csv(saida)[[f"{c}_outlier" for c in colunas]].astype(str)
+
+                    assert res["linhas"] == ref["linhas"], (backend, caminho, metodo)
+                    assert flags.equals(ref["flags"]), f"Marcações diferentes: {backend}, {caminho}, {metodo}"
+                    assert res["outliers"] == ref["outliers"], (backend, caminho, metodo)
+                    for c in colunas:
+                        for chave, valor in ref["estatisticas"][c].items():
+                            np.testing.assert_allclose(res["estatisticas"][c][chave], valor, rtol=1e-9, err_msg=f"{backend} {c} {chave}")
+                        np.testing.assert_allclose(res["limites"][c], ref["limites"][c], rtol=1e-9)
+
+                print(f"[OK] {os.path.basename(caminho)} - {metodo}" + (" (recusado na validação)" if ref is None else ""))
+
+def testar_particionamento():
+    """
+    Verifica que a divisão em chunks cobre todas as linhas sem chunks vazios, inclusive com menos
+    linhas que chunks, e que o resultado paralelo mantém a ordem das linhas e o índice original.
+    """
+    for linhas in [0, 1, 3, 7, 100_003]:
+        df = gerar_dataframe_teste(linhas=linhas, colunas=3)
+        df.index = np.random.permutation(linhas) * 7  # Índice fora de ordem, sem ser um RangeIndex
+
+        chunks = dividir_em_chunks(df, 4)
+        assert sum(len(chunk) for chunk in chunks) == linhas
+        assert all(len(chunk) > 0 for chunk in chunks)
+        assert len(chunks) == min(linhas, 4)  # Poucos bytes: o mínimo de 4 chunks prevalece
+
+        limites = {col: (df[col].mean() - 2 * df[col].std(), df[col].mean() + 2 * df[col].std()) for col in df.columns} if linhas > 1 else {}
+        esperado, _ = detectar_outliers(df, "IQR", list(df.columns), limites=limites)
+        funcao = lambda chunk: detectar_outliers(chunk, "IQR", list(df.columns), limites=limites)[0]
+        for n_threads in [1, 4]:
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                resultado = processar_particionado(df, funcao, executor, n_threads, "threads")
+            pd.testing.assert_frame_equal(resultado, esperado)
+            assert resultado.index is df.index or linhas == 0
+
+        print(f"[OK] particionamento - {linhas} linhas, {len(chunks)} chunks")
+
+def testar_lote():
+    """
+    Confere o modo lote contra a leitura de um arquivo só: o número de linhas de cada arquivo é o de
+    pd.read_csv (inclusive com a última linha sem quebra de linha) e, para Z-Score, os limites globais
+    e as contagens de outliers são os mesmos da análise de todos os arquivos concatenados.
+    """
+    print("\n==== Lote ====")
+    rng = np.random.default_rng(7)
+    with tempfile.TemporaryDirectory() as pasta:
+        entrada = os.path.join(pasta, "entrada")
+        os.makedirs(entrada)
+        for i, linhas in enumerate([10, 3_000, 25_000]):
+            df = pd.DataFrame({"col0": rng.normal(100, 20, linhas), "col1": rng.integers(0, 50, linhas)})
+            texto = df.to_csv(index=False)
+            if i == 0:
+                texto += "999,999"  # Outlier na última linha, sem quebra de linha no final
+            with open(os.path.join(entrada, f"parte_{i}.csv"), "w", encoding="utf-8") as f:
+                f.write(texto)
+
+        colunas = ["col0", "col1"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = processar_lote(entrada, pasta, colunas, "Z-Score", n_processos=2)
+        assert stats is not None
+
+        arquivos = sorted(os.listdir(entrada))
+        tabelas = [pd.read_csv(os.path.join(entrada, nome)) for nome in arquivos]
+        consolidado = pd.read_csv(os.path.join(pasta, "relatorio_lote.csv")).set_index("arquivo")
+        for nome, tabela in zip(arquivos, tabelas):
+            assert consolidado.loc[nome, "linhas"] == len(tabela), (nome, consolidado.loc[nome, "linhas"], len(tabela))
+
+        todos = pd.concat(tabelas, ignore_index=True)
+        with open(os.path.join(pasta, "relatorio_lote.json"), encoding="utf-8") as f:
+            limites = json.load(f)["limites"]
+        esperado, outliers = detectar_outliers(todos, "Z-Score", colunas)
+        for c in colunas:
+            np.testing.assert_allclose(limites[c], calcular_limites_outliers(todos[c], "Z-Score"), rtol=1e-9)
+            assert consolidado.loc["TOTAL", f"{c}_outliers"] == outliers[c]["quantidade_outliers"], c
+        assert consolidado.loc["parte_0.csv", "col0_outliers"] >= 1
+
+        print(f"[OK] lote - {len(arquivos)} arquivos, {len(todos)} linhas")
+
+def testar_incremental():
+    """
+    Confere quando o modo incremental reaproveita o estado: um acréscimo analisa só as linhas novas;
+    uma edição no meio do trecho já processado, um arquivo substituído (mesmo conteúdo, outro inode)
+    e um arquivo truncado forçam a execução completa.
+    """
+    print("\n==== Incremental ====")
+    rng = np.random.default_rng(11)
+
+    def linhas_csv(n: int) -> str:
+        return pd.DataFrame({"col0": rng.normal(0, 1, n).round(3), "col1": rng.normal(50, 5, n).round(3)}).to_csv(index=False, header=False)
+
+    def executar(caminho: str, pasta: str):
+        with contextlib.redirect_stdout(io.StringIO()):
+            df, _, foi_incremental, _ = processar_incremental(caminho, pasta, ["col0", "col1"], "IQR")
+        return df, foi_incremental
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "crescente.csv")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write("col0,col1\n" + linhas_csv(20_000))
+        df, foi_incremental = executar(caminho, pasta)
+        assert not foi_incremental and len(df) == 20_000
+
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(linhas_csv(100))
+        df, foi_incremental = executar(caminho, pasta)
+        assert foi_incremental and len(df) == 100, "acréscimo"
+        print("[OK] acréscimo - só as linhas novas")
+
+        # Edição no meio, mesmo tamanho e mesmo inode: '-0.5' vira '90.5', um outlier
+        with open(caminho, "r+b") as f:
+            conteudo = f.read()
+            posicao = conteudo.index(b"\n-", len(conteudo) // 2) + 1
+            f.seek(posicao)
+            f.write(b"9")
+        linha_editada = conteudo[:posicao].count(b"\n") - 1
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(linhas_csv(1))
+        df, foi_incremental = executar(caminho, pasta)
+        assert not foi_incremental and len(df) == 20_101, "edição no meio"
+        assert df["col0_outlier"].iloc[linha_editada], "linha editada não foi marcada"
+        print("[OK] edição no meio - execução completa, linha editada marcada")
+
+        # Substituído por outro arquivo com o mesmo conteúdo e um acréscimo
+        with open(caminho, "rb") as f:
+            conteudo = f.read()
+        with open(caminho + ".novo", "wb") as f:
+            f.write(conteudo + linhas_csv(1).encode("utf-8"))
+        os.replace(caminho + ".novo", caminho)
+        df, foi_incremental = executar(caminho, pasta)
+        assert not foi_incremental and len(df) == 20_102, "arquivo substituído"
+        print("[OK] arquivo substituído - execução completa")
+
+        with open(caminho, "r+b") as f:
+            f.truncate(len(conteudo) // 2)
+        df, foi_incremental = executar(caminho, pasta)
+        assert not foi_incremental and len(df) < 20_102, "arquivo truncado"
+        print("[OK] arquivo truncado - execução completa")
+
 def main():
     df_pequeno = gerar_dataframe_teste(linhas=5_000, colunas=5)
     df_medio = gerar_dataframe_teste(linhas=400_000, colunas=5)
@@ -63,4 +303,13 @@ def main():
     executar_teste("Arquivo Grande (2mi linhas)", df_grande)
 
 if __name__ == "__main__":
-    main()
+    if "equivalencia" in sys.argv[1:]:
+        testar_equivalencia_backends()
+    elif "particionamento" in sys.argv[1:]:
+        testar_particionamento()
+    elif "lote" in sys.argv[1:]:
+        testar_lote()
+    elif "incremental" in sys.argv[1:]:
+        testar_incremental()
+    else:
+        main()
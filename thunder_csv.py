@@ -4,21 +4,102 @@ import pandas as pd
 from functools import partial
 import numpy as np
 import logging
+import sys
+import time
+import cProfile
+import glob
+import importlib.util
+import threading
+import queue
+import codecs
+import csv
+import argparse
+import asyncio
+import ipaddress
+import shutil
+import tempfile
+import urllib.parse
+import ctypes
+import ctypes.util
+import select
+import signal
+import struct
+import io
+import json
+import hashlib
 import matplotlib.pyplot as plt
 import os
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from reportlab.pdfgen import canvas as pdf_canvas
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from tempfile import NamedTemporaryFile
+from reportlab.lib.utils import ImageReader
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from collections import deque, OrderedDict
 import tkinter as tk
 from tkinter import Tk, Canvas, Entry, Button, PhotoImage, messagebox, filedialog
 
+# Strings com armazenamento Arrow são opcionais: sem pyarrow, textos de alta cardinalidade ficam como object
+ARROW_DISPONIVEL = importlib.util.find_spec("pyarrow") is not None
+PSUTIL_DISPONIVEL = importlib.util.find_spec("psutil") is not None
+
+try:
+    import resource  # Indisponível no Windows; o pico de memória fica sem medição
+except ImportError:
+    resource = None
+
 arquivo_teste = "exemplo_thundercsv.xlsx"
 caminho_arquivo_csv = ""
 caminho_diretorio_saida = ""
 N_CHUNKS = 4
+BYTES_POR_CHUNK = 8 * 1024 * 1024  # Tamanho alvo de cada chunk em memória (ver limites_dos_chunks)
+TAMANHO_AMOSTRA_ESTADO = 10_000
+TAMANHO_AMOSTRA_LOTE = 100_000
+LIMITE_GRUPOS_PARALELO = 10_000
+PREVIA_BLOCOS = 64
+PREVIA_BYTES_POR_BLOCO = 128 * 1024
+PREVIA_LINHAS_XLSX = 50_000
+PDF_DPI = 100
+PDF_GRADE_PADRAO = (1, 2)  # (colunas, linhas) de gráficos por página
+PDF_GRADE_MUITAS_COLUNAS = (2, 3)
+PDF_LIMITE_COLUNAS_GRADE = 6
+FATOR_MEMORIA_PANDAS = 5  # Memória ocupada pelo DataFrame em relação ao tamanho do CSV (estimativa)
+TOLERANCIA_LIMITES = 0.05
+SUFIXO_ESTADO_INCREMENTAL = ".thundercsv_estado.json"
+BLOCOS_ASSINATURA = 256  # Blocos amostrados do trecho já processado (ver _assinatura_arquivo)
+BYTES_BLOCO_ASSINATURA = 4096
+ARQUIVO_METRICAS = "metricas_thundercsv.jsonl"
+INTERVALO_AMOSTRA_MEMORIA = 0.05  # Segundos entre leituras de RSS durante uma etapa medida
+LIMITE_CARDINALIDADE_CATEGORIA = 0.5
+MAX_AMOSTRAS_INVALIDAS = 5
+LINHAS_POR_CHUNK_FLUXO = 200_000
+TAMANHO_FILA_FLUXO = 2
+DIRETORIO_CACHE = os.path.join(Path.home(), ".thundercsv_cache")
+LIMITE_CACHE_MB = 256
+VERSAO_CACHE = 1  # Incrementar quando a lógica de detecção mudar, invalidando resultados antigos
+PARAMETROS_METODOS = {"IQR": {"fator_iqr": 1.5}, "Z-Score": {"limite_z": 3}}  # Lidos por todos os cálculos de limites
+FIM_FILA = object()  # Sentinela que encerra as filas do pipeline sobreposto
+ARQUIVO_PERFIL = "perfil_thundercsv.prof"
+ARQUIVO_ESTADO_DAEMON = ".thundercsv_daemon_estado.json"
+ARQUIVO_METRICAS_DAEMON = "metricas_daemon_thundercsv.json"
+TAMANHO_FILA_DAEMON = 32
+INTERVALO_VARREDURA_DAEMON = 2.0
+ESTABILIDADE_ARQUIVO_DAEMON = 2.0  # Segundos sem mudar de tamanho/mtime para considerar o arquivo completo
+INTERVALO_METRICAS_DAEMON = 30.0
+JANELA_VAZAO_DAEMON = 300.0
+PORTA_SERVICO = 8765
+LIMITE_UPLOAD_SERVICO_MB = 1024
+TAMANHO_CACHE_MEMORIA_SERVICO = 256
+ARQUIVOS_RELATORIO = {"relatorio.csv", "relatorio.xlsx", "relatorio_outliers.csv", "relatorio_outliers.xlsx", "relatorio_grupos.csv", "relatorio_lote.csv"}
+INOTIFY_CLOSE_WRITE = 0x08
+INOTIFY_MOVED_TO = 0x80
+INOTIFY_Q_OVERFLOW = 0x4000
+
+registros_etapas = []
+caminho_arquivo_metricas = None
+id_execucao = ""
 
 def gerar_csv_teste():
     # Gerar pequeno
@@ -63,6 +144,125 @@ def configurar_logging():
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
+def _rss_atual_mb() -> float | None:
+    """
+    Retorna a memória residente (RSS) atual do processo em MB: psutil se instalado, senão
+    /proc/self/statm (Linux), ou None se indisponível.
+    """
+    if PSUTIL_DISPONIVEL:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 2)
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 2)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def _pico_memoria_mb() -> float | None:
+    """
+    Retorna o pico de memória residente (RSS) do processo desde o início, em MB, ou None se indisponível (ex: Windows).
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+def iniciar_medicao(caminho_metricas: str | None = None):
+    """
+    Inicia uma nova medição de execução: limpa os registros anteriores e define onde
+    gravar as métricas em JSON lines (None = apenas em memória).
+    """
+    global registros_etapas, caminho_arquivo_metricas, id_execucao
+    registros_etapas = []
+    caminho_arquivo_metricas = caminho_metricas
+    id_execucao = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+def _gravar_registro(registro: dict):
+    registros_etapas.append(registro)
+    if caminho_arquivo_metricas:
+        try:
+            with open(caminho_arquivo_metricas, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, default=str) + "\n")
+        except OSError as e:
+            logging.error(f"Erro ao gravar métricas: {e}")
+
+@contextmanager
+def medir_etapa(nome: str, **extras):
+    """
+    Mede uma etapa do pipeline: tempo de parede, tempo de CPU e memória. O RSS é lido no início e no fim
+    e amostrado por uma thread a cada INTERVALO_AMOSTRA_MEMORIA segundos durante a etapa (pico_rss_mb);
+    pico_rss_processo_mb é o pico do processo desde o início (ru_maxrss), que inclui etapas anteriores.
+    O dicionário retornado pode receber campos extras dentro do bloco (ex: linhas, bytes).
+
+    Uso:
+        with medir_etapa("carregar", bytes=tamanho) as etapa:
+            df = carregar_arquivo_csv(caminho)
+            etapa["linhas"] = len(df)
+    """
+    registro = {"execucao": id_execucao, "etapa": nome, **extras}
+    rss_inicio = _rss_atual_mb()
+    amostras = [rss_inicio]
+    terminou = threading.Event()
+
+    def amostrar_memoria():
+        while not terminou.wait(INTERVALO_AMOSTRA_MEMORIA):
+            amostras.append(_rss_atual_mb())
+
+    amostrador = None
+    if rss_inicio is not None:
+        amostrador = threading.Thread(target=amostrar_memoria, daemon=True)
+        amostrador.start()
+    inicio_parede = time.perf_counter()
+    inicio_cpu = time.process_time()
+    try:
+        yield registro
+    finally:
+        registro["tempo_parede_s"] = round(time.perf_counter() - inicio_parede, 6)
+        registro["tempo_cpu_s"] = round(time.process_time() - inicio_cpu, 6)
+        terminou.set()
+        if amostrador:
+            amostrador.join()
+        rss_fim = _rss_atual_mb()
+        amostras.append(rss_fim)
+        registro["rss_inicio_mb"] = rss_inicio
+        registro["rss_fim_mb"] = rss_fim
+        registro["pico_rss_mb"] = max((a for a in amostras if a is not None), default=None)
+        registro["pico_rss_processo_mb"] = _pico_memoria_mb()
+        _gravar_registro(registro)
+
+def registrar_tempos_chunks(etapa: str, tempos: List[dict]):
+    """
+    Registra os tempos individuais de cada chunk processado por threads ou processos.
+    """
+    for tempo in tempos:
+        _gravar_registro({"execucao": id_execucao, "etapa": f"{etapa}/chunk", **tempo})
+
+def resumo_tempos() -> str:
+    """
+    Monta um resumo legível dos tempos das etapas da última medição.
+    """
+    linhas = []
+    for registro in registros_etapas:
+        if registro["etapa"].endswith("/chunk"):
+            continue
+        texto = f"{registro['etapa']}: {registro['tempo_parede_s']:.2f}s (CPU {registro['tempo_cpu_s']:.2f}s)"
+        if registro.get("linhas") is not None:
+            texto += f", {registro['linhas']} linhas"
+        linhas.append(texto)
+
+    chunks = [r for r in registros_etapas if r["etapa"].endswith("/chunk")]
+    if chunks:
+        tempos = [r["tempo_parede_s"] for r in chunks]
+        linhas.append(f"chunks: {len(chunks)} (mín {min(tempos):.2f}s, máx {max(tempos):.2f}s)")
+
+    etapas = [r for r in registros_etapas if r.get("pico_rss_mb") is not None]
+    if etapas:
+        maior = max(etapas, key=lambda r: r["pico_rss_mb"])
+        linhas.append(f"Pico de memória: {maior['pico_rss_mb']:.1f} MB (etapa {maior['etapa']})")
+    return "\n".join(linhas) if linhas else "Nenhuma etapa medida."
+
 def selecionar_arquivo():
     """
     Abre um seletor de arquivos para escolher um arquivo CSV ou XLSX e salva o caminho globalmente.
@@ -128,109 +328,313 @@ def carregar_arquivo_csv(file_path: str) -> pd.DataFrame | None:
         messagebox.showerror("Erro", f"Erro ao carregar o arquivo: {e}")
         return None
 
-def validar_estrutura_dados(df: pd.DataFrame, colunas_numericas_esperadas: List[str] = None, interromper_em_erro: bool = False) -> Tuple[bool, pd.DataFrame]:
+def otimizar_tipos(df: pd.DataFrame, colunas_numericas_esperadas: List[str] = None, limite_categoria: float = LIMITE_CARDINALIDADE_CATEGORIA, usar_arrow: bool = True, notificar: bool = True) -> Tuple[pd.DataFrame, dict]:
+    """
+    Compacta os tipos de dados de um DataFrame sem perder informação:
+    - inteiros são reduzidos ao menor tipo que comporta os valores (int8, uint16, ...);
+    - floats ficam em float64: em float32, somas, médias e limites seriam calculados com menos precisão;
+    - textos com poucos valores distintos viram 'category';
+    - os demais textos viram 'string[pyarrow]' quando o pyarrow está instalado.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame recém-carregado.
+        colunas_numericas_esperadas (List[str], opcional): Colunas que serão convertidas para número
+                                                          na validação; não são transformadas em texto/categoria.
+        limite_categoria (float): Proporção máxima de valores distintos (sobre os não nulos) para usar 'category'.
+        usar_arrow (bool): Permite usar strings com armazenamento Arrow.
+        notificar (bool): Se False, não imprime nem registra o relatório (ex: chunks do pipeline sobreposto).
+
+    Retorno:
+        tuple:
+            - pd.DataFrame: DataFrame com os tipos compactados.
+            - dict: Relatório com a memória antes/depois (MB) e as conversões feitas por coluna.
+    """
+    memoria_antes = df.memory_usage(deep=True).sum()
+    preservar = set(colunas_numericas_esperadas or [])
+    df_out = df.copy(deep=False)
+    conversoes = {}
+
+    for coluna in df_out.columns:
+        serie = df_out[coluna]
+        tipo_original = serie.dtype
+        if pd.api.types.is_bool_dtype(serie):
+            continue
+
+        if pd.api.types.is_integer_dtype(serie):
+            nova = pd.to_numeric(serie, downcast="unsigned" if serie.min() >= 0 else "integer")
+        elif coluna not in preservar and pd.api.types.infer_dtype(serie, skipna=True) == "string":
+            nao_nulos = serie.count()
+            if nao_nulos and serie.nunique() / nao_nulos <= limite_categoria:
+                nova = serie.astype("category")
+            elif usar_arrow and ARROW_DISPONIVEL and serie.dtype == object:
+                nova = serie.astype("string[pyarrow]")
+            else:
+                continue
+        else:
+            continue
+
+        if nova.dtype != tipo_original:
+            df_out[coluna] = nova
+            conversoes[coluna] = f"{tipo_original} -> {nova.dtype}"
+
+    memoria_depois = df_out.memory_usage(deep=True).sum()
+    relatorio = {
+        "memoria_antes_mb": round(float(memoria_antes) / (1024 * 1024), 2),
+        "memoria_depois_mb": round(float(memoria_depois) / (1024 * 1024), 2),
+        "reducao_percentual": round(float(1 - memoria_depois / memoria_antes) * 100, 2) if memoria_antes else 0.0,
+        "conversoes": conversoes
+    }
+    if notificar:
+        print(f"Tipos otimizados: {relatorio['memoria_antes_mb']} MB -> {relatorio['memoria_depois_mb']} MB "
+              f"({relatorio['reducao_percentual']}% a menos).")
+        logging.info(f"Otimização de tipos: {relatorio}")
+    return df_out, relatorio
+
+def aplicar_esquema_tipos(df: pd.DataFrame, esquema: dict) -> pd.DataFrame:
+    """
+    Converte as colunas numéricas de um chunk para os tipos de esquema, decididos por otimizar_tipos
+    no primeiro chunk, para que todos os chunks tenham os mesmos tipos e o pd.concat não os alargue.
+    Uma coluna que não cabe no tipo sem perda recebe o tipo promovido, e o esquema é alargado
+    (em esquema, in place) para os chunks seguintes.
+
+    Parâmetros:
+        df (pd.DataFrame): Chunk com as colunas do esquema.
+        esquema (dict): {coluna: dtype}.
+
+    Retorno:
+        pd.DataFrame: Chunk com os tipos do esquema.
+    """
+    df_out = df.copy(deep=False)
+    for coluna, tipo in esquema.items():
+        serie = df_out[coluna]
+        if serie.dtype == tipo or not (pd.api.types.is_numeric_dtype(serie) and pd.api.types.is_numeric_dtype(tipo)):
+            continue
+        nova = serie.astype(tipo)
+        if not np.array_equal(nova.to_numpy(dtype=np.float64), serie.to_numpy(dtype=np.float64), equal_nan=True):
+            # Menor tipo que comporta os dois: inteiros do chunk são reduzidos antes da promoção
+            compacto = serie.dtype
+            if pd.api.types.is_integer_dtype(serie):
+                compacto = pd.to_numeric(serie, downcast="unsigned" if serie.min() >= 0 else "integer").dtype
+            tipo = np.promote_types(tipo, compacto)
+            esquema[coluna] = tipo
+            nova = serie.astype(tipo)
+        df_out[coluna] = nova
+    return df_out
+
+def gerar_relatorio_validacao(df: pd.DataFrame, colunas_numericas_esperadas: List[str] = None, max_amostras: int = MAX_AMOSTRAS_INVALIDAS) -> Tuple[pd.DataFrame, dict]:
+    """
+    Valida um DataFrame (ou um chunk dele) em uma única passada por coluna:
+    converte as colunas numéricas esperadas, conta nulos e falhas de conversão,
+    infere o tipo resultante e guarda exemplos de valores inválidos com o rótulo do índice do df.
+    Com o RangeIndex da leitura, o rótulo é a posição do registro entre os dados lidos (0 = primeira
+    linha após o cabeçalho), não a linha física do arquivo (ver numerar_linhas_csv).
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame ou chunk a ser validado.
+        colunas_numericas_esperadas (List[str], opcional): Colunas que devem ser numéricas.
+        max_amostras (int): Quantidade máxima de exemplos de valores inválidos por coluna.
+
+    Retorno:
+        tuple:
+            - pd.DataFrame: DataFrame com as colunas esperadas convertidas para número (valores inválidos viram NaN).
+            - dict: Relatório mesclável com mesclar_relatorios_validacao.
+    """
+    esperadas = list(colunas_numericas_esperadas or [])
+    df_out = df.copy(deep=False)
+    relatorio = {
+        "linhas": len(df),
+        "colunas_ausentes": [col for col in esperadas if col not in df.columns],
+        "colunas": {}
+    }
+
+    for coluna in df.columns:
+        serie = df[coluna]
+        nulos_originais = serie.isna()
+        falhas = 0
+        amostras = []
+
+        if coluna in esperadas and not pd.api.types.is_numeric_dtype(serie):
+            # 'coerce' transforma valores não numéricos em NaN; as falhas são os NaN novos
+            convertida = pd.to_numeric(serie, errors='coerce')
+            mascara_falhas = convertida.isna() & ~nulos_originais
+            falhas = int(mascara_falhas.sum())
+            if falhas:
+                invalidos = serie[mascara_falhas].head(max_amostras)
+                amostras = [[int(indice) if isinstance(indice, (int, np.integer)) else str(indice), str(valor)]
+                            for indice, valor in invalidos.items()]
+            df_out[coluna] = convertida
+            serie = convertida
+
+        relatorio["colunas"][coluna] = {
+            "tipo": str(serie.dtype),
+            "numerica": bool(pd.api.types.is_numeric_dtype(serie)),
+            "esperada_numerica": coluna in esperadas,
+            "nulos": int(nulos_originais.sum()) + falhas,
+            "falhas_conversao": falhas,
+            "amostras_invalidas": amostras
+        }
+
+    return df_out, relatorio
+
+def _mesclar_tipos(tipo_a: str, tipo_b: str) -> str:
+    """
+    Tipo comum a dois chunks: promoção numérica (ex: int64 + float64 = float64) ou 'object' se incompatíveis.
+    """
+    if tipo_a == tipo_b:
+        return tipo_a
+    try:
+        dtype_a, dtype_b = np.dtype(tipo_a), np.dtype(tipo_b)
+    except TypeError:
+        return "object"
+    if dtype_a.kind in "biuf" and dtype_b.kind in "biuf":
+        return str(np.promote_types(dtype_a, dtype_b))
+    return "object"
+
+def mesclar_relatorios_validacao(a: dict, b: dict, max_amostras: int = MAX_AMOSTRAS_INVALIDAS) -> dict:
+    """
+    Combina relatórios de validação de chunks diferentes do mesmo arquivo.
+    """
+    colunas = dict(a["colunas"])
+    for coluna, info_b in b["colunas"].items():
+        info_a = colunas.get(coluna)
+        if info_a is None:
+            colunas[coluna] = info_b
+            continue
+        colunas[coluna] = {
+            "tipo": _mesclar_tipos(info_a["tipo"], info_b["tipo"]),
+            "numerica": info_a["numerica"] and info_b["numerica"],
+            "esperada_numerica": info_a["esperada_numerica"],
+            "nulos": info_a["nulos"] + info_b["nulos"],
+            "falhas_conversao": info_a["falhas_conversao"] + info_b["falhas_conversao"],
+            "amostras_invalidas": (info_a["amostras_invalidas"] + info_b["amostras_invalidas"])[:max_amostras]
+        }
+    return {
+        "linhas": a["linhas"] + b["linhas"],
+        "colunas_ausentes": [col for col in a["colunas_ausentes"] if col in b["colunas_ausentes"]],
+        "colunas": colunas
+    }
+
+def avaliar_relatorio_validacao(relatorio: dict, interromper_em_erro: bool = False) -> Tuple[bool, List[str]]:
+    """
+    Decide, a partir de um relatório de validação, se os dados passam e quais problemas foram encontrados.
+
+    Parâmetros:
+        relatorio (dict): Relatório gerado (e possivelmente mesclado) por gerar_relatorio_validacao.
+        interromper_em_erro (bool): Se True, qualquer problema grave em coluna numérica esperada
+                                    (ausente, nulos ou tipo não numérico) interrompe o processo.
+
+    Retorno:
+        tuple:
+            - bool: True se a validação passou (ou se os problemas são apenas avisos e o processo continua).
+            - List[str]: Mensagens de aviso/erro encontradas.
+    """
+    valido = True
+    problemas = []
+    total = relatorio["linhas"]
+
+    for coluna in relatorio["colunas_ausentes"]:
+        problemas.append(f"Coluna numérica esperada '{coluna}' não encontrada no DataFrame.")
+        if interromper_em_erro:
+            return False, problemas
+
+    for coluna, info in relatorio["colunas"].items():
+        if info["falhas_conversao"]:
+            percentual = info["falhas_conversao"] / total * 100 if total else 0.0
+            problemas.append(f"Coluna '{coluna}' contém {info['falhas_conversao']} ({percentual:.2f}%) valores não numéricos que foram convertidos para NaN.")
+
+        if info["nulos"]:
+            valido = False
+            problemas.append(f"Coluna '{coluna}' contém {info['nulos']} valores nulos.")
+            if interromper_em_erro and info["esperada_numerica"]:
+                return False, problemas
+
+        if info["esperada_numerica"] and not info["numerica"]:
+            valido = False
+            problemas.append(f"Coluna '{coluna}' ainda não é numérica após tentativa de conversão. Tipo atual: {info['tipo']}")
+            if interromper_em_erro:
+                return False, problemas
+
+    return valido, problemas
+
+def formatar_relatorio_validacao(relatorio: dict, problemas: List[str]) -> str:
+    """
+    Monta um texto legível a partir do relatório de validação, para console ou log.
+    """
+    linhas = [f"Validação: {relatorio['linhas']} linhas, {len(relatorio['colunas'])} colunas."]
+    for coluna, info in relatorio["colunas"].items():
+        texto = f"  {coluna}: {info['tipo']}, {info['nulos']} nulos"
+        if info["amostras_invalidas"]:
+            exemplos = ", ".join(f"registro {indice}: {valor!r}" for indice, valor in info["amostras_invalidas"])
+            texto += f" (ex.: {exemplos})"
+        linhas.append(texto)
+    linhas.extend(f"  - {problema}" for problema in problemas)
+    if not problemas:
+        linhas.append("  Nenhum problema encontrado.")
+    return "\n".join(linhas)
+
+def validar_estrutura_dados(df: pd.DataFrame, colunas_numericas_esperadas: List[str] = None, interromper_em_erro: bool = False, n_workers: int = 1) -> Tuple[bool, pd.DataFrame, dict]:
     """
     Valida a estrutura de um DataFrame, verificando tipos de dados, valores nulos e inconsistências.
-    Pode, opcionalmente, interromper o processo ou tentar converter colunas.
+    Colunas numéricas esperadas são convertidas (valores inválidos viram NaN).
 
     Args:
         df (pd.DataFrame): O DataFrame a ser validado.
         colunas_numericas_esperadas (List[str], opcional): Uma lista de nomes de colunas que se espera que sejam numéricas.
                                                          Se None, todas as colunas serão verificadas quanto a nulos/tipos.
-        interromper_em_erro (bool): Se True, a função retorna (False, None) e imprime uma mensagem de erro
-                                     se houver alguma inconsistência grave (nulos em colunas esperadas como numéricas
-                                     ou falha na conversão). Se False, tenta prosseguir e corrigir.
+        interromper_em_erro (bool): Se True, a função retorna (False, None, relatorio) se houver alguma inconsistência
+                                     grave (coluna ausente, nulos ou falha na conversão de colunas esperadas como numéricas).
+        n_workers (int): Quantidade de threads; acima de 1 o DataFrame é validado em chunks e os relatórios são mesclados.
 
     Returns:
-        Tuple[bool, pd.DataFrame]: Uma tupla contendo:
-                                   - bool: True se a validação passar (ou se erros forem tratados), False caso contrário.
-                                   - pd.DataFrame: O DataFrame potencialmente limpo ou modificado, ou None se a validação falhar e 'interromper_em_erro' for True.
+        Tuple[bool, pd.DataFrame, dict]: Uma tupla contendo:
+                                   - bool: True se a validação passar, False caso contrário.
+                                   - pd.DataFrame: O DataFrame com as colunas convertidas, ou None se a validação falhar e 'interromper_em_erro' for True.
+                                   - dict: O relatório de validação (ver gerar_relatorio_validacao), com a lista de "problemas".
     """
-    print("\n--- Iniciando validação da estrutura dos dados ---")
-    valido = True
-    df_copia = df.copy() # Trabalha em uma cópia para não alterar o DataFrame original diretamente
-    
-    # 1. Verifica a presença de colunas numéricas esperadas
-    if colunas_numericas_esperadas:
-        for col in colunas_numericas_esperadas:
-            if col not in df_copia.columns:
-                print(f"Aviso: Coluna numérica esperada '{col}' não encontrada no DataFrame.")
-                if interromper_em_erro:
-                    print("Processo interrompido devido à coluna numérica esperada não encontrada.")
-                    return False, None
-                continue # Pula para a próxima coluna se não encontrada
-
-            # Tenta converter a coluna para tipo numérico
-            # 'coerce' transforma valores não numéricos em NaN (Not a Number)
-            df_copia[col] = pd.to_numeric(df_copia[col], errors='coerce')
-            
-            # Verifica se a conversão resultou em muitos NaNs (indicando valores não numéricos)
-            # Um limite razoável para a proporção de NaNs para considerar a coluna numérica corrompida.
-            # Aqui, consideramos que se mais de 20% da coluna se tornou NaN após a coerção, há um problema.
-            na_count = df_copia[col].isnull().sum()
-            if na_count > 0:
-                total_rows = len(df_copia[col])
-                if total_rows > 0:
-                    na_percentage = (na_count / total_rows) * 100
-                    print(f"Alerta: Coluna '{col}' contém {na_count} ({na_percentage:.2f}%) valores não numéricos que foram convertidos para NaN.")
-                else:
-                     print(f"Alerta: Coluna '{col}' contém {na_count} valores não numéricos que foram convertidos para NaN (DataFrame vazio).")
-
-                if na_percentage > 20 and interromper_em_erro: # Exemplo: se mais de 20% for NaN
-                    print(f"Erro: Coluna '{col}' tem alta proporção de valores não numéricos. Interrompendo processo.")
-                    return False, None
-                
-                # Opcional: preencher NaNs com a média ou 0, ou remover as linhas
-                # df_copia[col].fillna(df_copia[col].mean(), inplace=True) # Preenche com a média
-                # df_copia.dropna(subset=[col], inplace=True) # Remove linhas com NaN nessa coluna
-    
-    # 2. Verifica valores nulos em todas as colunas
-    nulos_por_coluna = df_copia.isnull().sum()
-    colunas_com_nulos = nulos_por_coluna[nulos_por_coluna > 0]
-
-    if not colunas_com_nulos.empty:
-        print("\nColunas com valores nulos:")
-        print(colunas_com_nulos)
-        valido = False # Há nulos, então a validação não é perfeita
-        
-        # Estratégia de tratamento de nulos:
-        # Você pode optar por:
-        # a) Remover linhas com nulos: df_copia.dropna(inplace=True)
-        # b) Preencher nulos: df_copia.fillna(value=0, inplace=True) ou df_copia.fillna(df_copia.mean(), inplace=True)
-        # c) Interromper se for crítico
-        
-        # Exemplo: Se há nulos em colunas que eram esperadas como numéricas e a flag de interrupção está ativada
-        if interromper_em_erro and colunas_numericas_esperadas:
-             for col_num_esperada in colunas_numericas_esperadas:
-                 if col_num_esperada in colunas_com_nulos.index:
-                     print(f"Erro: Valores nulos encontrados na coluna numérica esperada '{col_num_esperada}'. Interrompendo processo.")
-                     return False, None
-        
-        print("Aviso: Valores nulos detectados. Considere tratá-los (remoção, preenchimento, etc.) antes da análise.")
-    else:
-        print("Nenhum valor nulo encontrado em todo o DataFrame.")
-
-    # 3. Verifica tipos inconsistentes (após a coerção para numéricos)
-    print("\nTipos de dados atuais das colunas:")
-    print(df_copia.dtypes)
-
-    # Verifica se há 'object' dtypes em colunas que deveriam ser numéricas
-    if colunas_numericas_esperadas:
-        for col in colunas_numericas_esperadas:
-            if col in df_copia.columns and not pd.api.types.is_numeric_dtype(df_copia[col]):
-                print(f"Erro: Coluna '{col}' ainda não é numérica após tentativa de conversão. Tipo atual: {df_copia[col].dtype}")
-                valido = False
-                if interromper_em_erro:
-                    print("Processo interrompido devido a tipo de dado inconsistente em coluna numérica esperada.")
-                    return False, None
-    
-    if valido:
-        print("\nValidação da estrutura dos dados concluída: OK.")
-        messagebox.showinfo("Sucesso", "Validação da estrutura dos dados concluída")
+    if n_workers > 1 and len(df) > n_workers:
+        limites = _limites_do_dataframe(df, n_workers, BYTES_POR_CHUNK)
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            saidas = list(executor.map(partial(gerar_relatorio_validacao, colunas_numericas_esperadas=colunas_numericas_esperadas),
+                                       [df.iloc[inicio:fim] for inicio, fim in limites]))
+        df_validado = montar_resultado_chunks(df, limites, ((i, chunk) for i, (chunk, _) in enumerate(saidas)))
+        relatorio = saidas[0][1]
+        for _, relatorio_chunk in saidas[1:]:
+            relatorio = mesclar_relatorios_validacao(relatorio, relatorio_chunk)
     else:
-        print("\nValidação da estrutura dos dados concluída: COM AVISOS/ERROS. Verifique as mensagens acima.")
-    
-    return valido, df_copia
+        df_validado, relatorio = gerar_relatorio_validacao(df, colunas_numericas_esperadas)
+
+    valido, problemas = avaliar_relatorio_validacao(relatorio, interromper_em_erro)
+    relatorio["problemas"] = problemas
+    relatorio["valido"] = valido
+
+    if not valido and interromper_em_erro:
+        return False, None, relatorio
+    return valido, df_validado, relatorio
+
+def validar_csv_em_fluxo(caminho: str, colunas_numericas_esperadas: List[str] = None, linhas_por_chunk: int = 100_000, interromper_em_erro: bool = False) -> dict:
+    """
+    Valida um CSV em modo streaming, chunk a chunk, sem carregar o arquivo inteiro na memória.
+    Com interromper_em_erro, a leitura para no primeiro chunk que reprova o arquivo.
+
+    Retorno:
+        dict: Relatório de validação mesclado de todos os chunks lidos, com "valido" e "problemas".
+    """
+    relatorio = None
+    leitor = pd.read_csv(caminho, sep=',', on_bad_lines='skip', chunksize=linhas_por_chunk, encoding=_detectar_codificacao(caminho))
+    with leitor:
+        for chunk in leitor:
+            _, relatorio_chunk = gerar_relatorio_validacao(chunk, colunas_numericas_esperadas)
+            relatorio = relatorio_chunk if relatorio is None else mesclar_relatorios_validacao(relatorio, relatorio_chunk)
+            if interromper_em_erro and not avaliar_relatorio_validacao(relatorio, interromper_em_erro)[0]:
+                # Nulos e colunas ausentes só aumentam: não adianta ler o resto do arquivo
+                break
+
+    if relatorio is None:
+        relatorio = {"linhas": 0, "colunas_ausentes": list(colunas_numericas_esperadas or []), "colunas": {}}
+    valido, problemas = avaliar_relatorio_validacao(relatorio, interromper_em_erro)
+    relatorio["problemas"] = problemas
+    relatorio["valido"] = valido
+    return relatorio
 
 def filtrar_colunas(df: pd.DataFrame, colunas_escolhidas: List[str]) -> pd.DataFrame | None:
     """
@@ -263,7 +667,36 @@ def filtrar_colunas(df: pd.DataFrame, colunas_escolhidas: List[str]) -> pd.DataF
     print(f"Colunas '{', '.join(colunas_escolhidas)}' selecionadas com sucesso.")
     return df_filtrado
 
-def detectar_outliers(df: pd.DataFrame, metodo: str = "IQR", colunas: list = None) -> pd.DataFrame:
+def calcular_limites_outliers(serie: pd.Series, metodo: str = "IQR") -> Tuple[float, float]:
+    """
+    Calcula os limites inferior e superior fora dos quais um valor é considerado outlier.
+
+    Parâmetros:
+        serie (pd.Series): Valores numéricos da coluna.
+        metodo (str): "IQR" ou "Z-Score".
+
+    Retorno:
+        tuple: (limite_inferior, limite_superior).
+    """
+    if metodo == "IQR":
+        # Define como outlier qualquer valor muito abaixo do primeiro quartil (Q1) ou muito acima do terceiro quartil (Q3),
+        # a mais de fator_iqr (padrão 1,5) vezes o intervalo interquartil
+        q1 = serie.quantile(0.25)
+        q3 = serie.quantile(0.75)
+        iqr = q3 - q1
+        fator = PARAMETROS_METODOS["IQR"]["fator_iqr"]
+        return q1 - fator * iqr, q3 + fator * iqr
+
+    elif metodo == "Z-Score":
+        # Define como outlier qualquer valor a mais de limite_z (padrão 3) desvios padrão da média
+        media = serie.mean()
+        desvio = serie.std()
+        limite_z = PARAMETROS_METODOS["Z-Score"]["limite_z"]
+        return media - limite_z * desvio, media + limite_z * desvio
+
+    raise ValueError("Método inválido. Use 'IQR' ou 'Z-Score'.")
+
+def detectar_outliers(df: pd.DataFrame, metodo: str = "IQR", colunas: list = None, limites: dict = None) -> pd.DataFrame:
     """
     Detecta outliers nas colunas numéricas de um DataFrame usando IQR ou Z-Score,
     e retorna também estatísticas resumidas dos outliers.
@@ -272,196 +705,2705 @@ def detectar_outliers(df: pd.DataFrame, metodo: str = "IQR", colunas: list = Non
         df (pd.DataFrame): DataFrame com os dados.
         metodo (str): "IQR" ou "Z-Score".
         colunas (list): Lista de colunas a analisar (opcional).
+        limites (dict): Limites já calculados por coluna, {coluna: (inferior, superior)} (opcional).
+                        Colunas presentes aqui não têm os limites recalculados sobre o df.
 
     Retorno:
         tuple:
             - pd.DataFrame: DataFrame com colunas extras indicando outliers.
             - dict: Estatísticas dos outliers por coluna (quantidade e percentual).
     """
+    if metodo not in ("IQR", "Z-Score"):
+        raise ValueError("Método inválido. Use 'IQR' ou 'Z-Score'.")
+
     df_out = df.copy()
     if colunas is None:
         colunas = df.select_dtypes(include='number').columns 
+    if limites is None:
+        limites = {}
+
+    estatisticas_outliers = {}
+
+    for coluna in colunas:
+        if coluna not in df.columns:
+            continue 
+
+        if coluna in limites:
+            lim_inf, lim_sup = limites[coluna]
+        else:
+            lim_inf, lim_sup = calcular_limites_outliers(df[coluna], metodo)
+        outliers = (df[coluna] < lim_inf) | (df[coluna] > lim_sup)
+
+        # Marca no DataFrame
+        df_out[f"{coluna}_outlier"] = outliers
+
+        # Salva estatísticas
+        quantidade = int(outliers.sum())
+        percentual = round(quantidade / len(df) * 100, 2) if len(df) > 0 else 0.0
+        estatisticas_outliers[coluna] = {
+            "quantidade_outliers": int(quantidade),
+            "percentual_outliers": percentual
+        }
+
+    return df_out, estatisticas_outliers
+
+def _chave_grupo_texto(chave) -> str:
+    # Chaves compostas (tuplas) viram "loja1|sensor3" para caber em JSON e CSV
+    return "|".join(map(str, chave)) if isinstance(chave, tuple) else str(chave)
+
+def detectar_outliers_por_grupo(df: pd.DataFrame, metodo: str = "IQR", colunas: list = None, colunas_grupo: List[str] = None, n_processos: int = 1) -> Tuple[pd.DataFrame, dict, pd.DataFrame]:
+    """
+    Detecta outliers com limites calculados separadamente para cada valor das colunas de grupo
+    (ex: por loja ou por sensor), com groupby vetorizado (quantis ou média/desvio por grupo).
+    Linhas com chave de grupo nula não são marcadas.
+
+    Com n_processos > 1 e muitos grupos, as linhas são particionadas pelo hash da chave
+    (um grupo nunca fica dividido entre partições) e cada partição roda em um processo.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame com os dados.
+        metodo (str): "IQR" ou "Z-Score".
+        colunas (list): Colunas numéricas a analisar (opcional).
+        colunas_grupo (List[str]): Colunas que definem os grupos.
+        n_processos (int): Número de processos para o particionamento por hash.
+
+    Retorno:
+        tuple:
+            - pd.DataFrame: DataFrame com colunas extras indicando outliers (mesma ordem de linhas).
+            - dict: Estatísticas dos outliers por coluna, com "por_grupo": {chave: quantidade}.
+            - pd.DataFrame: Contagem de linhas e de outliers por grupo (uma linha por grupo).
+    """
+    if metodo not in ("IQR", "Z-Score"):
+        raise ValueError("Método inválido. Use 'IQR' ou 'Z-Score'.")
+    if colunas is None:
+        colunas = [col for col in df.select_dtypes(include='number').columns if col not in colunas_grupo]
+    colunas = [col for col in colunas if col in df.columns]
+
+    if n_processos > 1 and df.groupby(colunas_grupo, observed=True, sort=False).ngroups >= LIMITE_GRUPOS_PARALELO:
+        particao = pd.util.hash_pandas_object(df[colunas_grupo], index=False).to_numpy() % n_processos
+        posicoes = [np.flatnonzero(particao == p) for p in range(n_processos)]
+        posicoes = [pos for pos in posicoes if len(pos)]
+        with ProcessPoolExecutor(max_workers=len(posicoes)) as executor:
+            partes = list(executor.map(
+                partial(detectar_outliers_por_grupo, metodo=metodo, colunas=colunas, colunas_grupo=colunas_grupo),
+                [df.iloc[pos] for pos in posicoes]
+            ))
+        # Devolve as linhas à ordem original
+        ordem = np.argsort(np.concatenate(posicoes), kind="stable")
+        df_out = pd.concat([parte[0] for parte in partes]).iloc[ordem]
+        contagens = pd.concat([parte[2] for parte in partes], ignore_index=True)
+    else:
+        df_out = df.copy()
+        grupos = df.groupby(colunas_grupo, observed=True, sort=False)
+        for coluna in colunas:
+            serie = grupos[coluna]
+            if metodo == "IQR":
+                q1 = serie.transform("quantile", 0.25)
+                q3 = serie.transform("quantile", 0.75)
+                iqr = q3 - q1
+                fator = PARAMETROS_METODOS["IQR"]["fator_iqr"]
+                lim_inf, lim_sup = q1 - fator * iqr, q3 + fator * iqr
+            else:
+                media = serie.transform("mean")
+                desvio = serie.transform("std")
+                limite_z = PARAMETROS_METODOS["Z-Score"]["limite_z"]
+                lim_inf, lim_sup = media - limite_z * desvio, media + limite_z * desvio
+            df_out[f"{coluna}_outlier"] = (df[coluna] < lim_inf) | (df[coluna] > lim_sup)
+
+        colunas_flag = [f"{coluna}_outlier" for coluna in colunas]
+        contagens = df_out.groupby(colunas_grupo, observed=True, sort=False)[colunas_flag].sum().astype(int)
+        contagens.insert(0, "linhas", grupos.size())
+        contagens = contagens.reset_index()
+
+    estatisticas_outliers = {}
+    chaves = [_chave_grupo_texto(chave) for chave in contagens[colunas_grupo].itertuples(index=False, name=None)] \
+        if len(colunas_grupo) > 1 else [str(chave) for chave in contagens[colunas_grupo[0]]]
+    for coluna in colunas:
+        quantidade = int(df_out[f"{coluna}_outlier"].sum())
+        estatisticas_outliers[coluna] = {
+            "quantidade_outliers": quantidade,
+            "percentual_outliers": round(quantidade / len(df) * 100, 2) if len(df) > 0 else 0.0,
+            "por_grupo": dict(zip(chaves, contagens[f"{coluna}_outlier"].astype(int).tolist()))
+        }
+
+    return df_out, estatisticas_outliers, contagens
+
+def calcular_estatisticas(df: pd.DataFrame) -> dict:
+    """
+    Calcula estatísticas básicas (média, soma, mínimo, máximo, contagem)
+    para cada coluna numérica do DataFrame.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame com os dados filtrados.
+
+    Retorno:
+        dict: Dicionário contendo as estatísticas por coluna.
+    """
+    estatisticas = {}
+    colunas_numericas = df.select_dtypes(include='number').columns
+
+    for coluna in colunas_numericas:
+        dados = df[coluna]
+        estatisticas[coluna] = {
+            'media': dados.mean(),
+            'soma': dados.sum(),
+            'minimo': dados.min(),
+            'maximo': dados.max(),
+            'contagem': dados.count()
+        }
+
+    return estatisticas
+
+def _renderizar_grafico(tipo: str, serie: pd.Series, coluna: str, largura_pol: float, altura_pol: float, dpi: int) -> bytes:
+    """
+    Desenha um gráfico em memória e devolve o PNG em bytes.
+    Usa Figure diretamente (sem pyplot): nada fica registrado globalmente e a figura é liberada ao retornar.
+    """
+    fig = Figure(figsize=(largura_pol, altura_pol), dpi=dpi)
+    FigureCanvasAgg(fig)
+    eixo = fig.add_subplot()
+
+    if tipo == "boxplot":
+        try:
+            eixo.boxplot(serie, orientation="horizontal")
+        except TypeError:
+            # matplotlib < 3.10
+            eixo.boxplot(serie, vert=False)
+        eixo.set_yticklabels([coluna])
+        eixo.set_title(f"Boxplot - {coluna}")
+        eixo.set_xlabel(coluna)
+    elif tipo == "hist":
+        eixo.hist(serie, bins=10, color="skyblue", edgecolor="black")
+        eixo.set_title(f"Histograma - {coluna}")
+    elif tipo == "bar":
+        contagens = serie.value_counts().sort_index()
+        eixo.bar([str(valor) for valor in contagens.index], contagens.to_numpy(), color="lightgreen", edgecolor="black")
+        eixo.tick_params(axis="x", labelrotation=90)
+        eixo.set_title(f"Gráfico de Barras - {coluna}")
+
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    return buffer.getvalue()
+
+def gerar_graficos_pdf(df: pd.DataFrame, opcoes: dict, pasta_saida: str, nome_pdf: str = "relatorio_graficos.pdf", dpi: int = PDF_DPI, grade: Tuple[int, int] = None):
+    """
+    Gera gráficos com base nas opções e insere todos em um PDF salvo na pasta de saída.
+    O PDF é montado página a página: cada gráfico é renderizado em memória, desenhado e descartado,
+    sem arquivos temporários e sem acumular figuras, então o uso de memória não cresce com o número de colunas.
+
+    Parâmetros:
+        df (pd.DataFrame): Dados a serem usados nos gráficos.
+        opcoes (dict): Dicionário com opções de gráfico (ex: {"boxplot": True, "hist": False}).
+        pasta_saida (str): Caminho onde o PDF será salvo.
+        nome_pdf (str): Nome do arquivo PDF de saída.
+        dpi (int): Resolução das imagens; o tamanho de cada imagem é o da célula da grade.
+        grade (Tuple[int, int], opcional): (colunas, linhas) de gráficos por página. Se None, usa
+                                           PDF_GRADE_PADRAO, ou PDF_GRADE_MUITAS_COLUNAS quando há
+                                           mais de PDF_LIMITE_COLUNAS_GRADE colunas.
+
+    Retorno:
+        None
+    """
+    colunas_numericas = [col for col in df.select_dtypes(include='number').columns if not col.endswith("_outlier")]
+    pdf_path = os.path.join(pasta_saida, nome_pdf)
+    if grade is None:
+        grade = PDF_GRADE_MUITAS_COLUNAS if len(colunas_numericas) > PDF_LIMITE_COLUNAS_GRADE else PDF_GRADE_PADRAO
+    n_colunas_grade, n_linhas_grade = grade
+    por_pagina = n_colunas_grade * n_linhas_grade
+
+    largura_pagina, altura_pagina = A4
+    margem = 36
+    largura_celula = (largura_pagina - 2 * margem) / n_colunas_grade
+    altura_celula = (altura_pagina - 2 * margem) / n_linhas_grade
+    # Área da imagem dentro da célula (descontando o título), em polegadas para o matplotlib
+    largura_imagem, altura_imagem = largura_celula - 8, altura_celula - 22
+
+    tipos = [tipo for tipo in ("boxplot", "hist", "bar") if opcoes.get(tipo)]
+    pdf = pdf_canvas.Canvas(pdf_path, pagesize=A4)
+    total = 0
+    for coluna in colunas_numericas:
+        serie = df[coluna].dropna()
+        for tipo in tipos:
+            if tipo == "bar" and serie.nunique() > 20:
+                continue
+
+            if total and total % por_pagina == 0:
+                pdf.showPage()
+            posicao = total % por_pagina
+            x = margem + (posicao % n_colunas_grade) * largura_celula
+            y = altura_pagina - margem - (posicao // n_colunas_grade + 1) * altura_celula
+
+            png = _renderizar_grafico(tipo, serie, coluna, largura_imagem / 72, altura_imagem / 72, dpi)
+            pdf.setFont("Helvetica-Bold", 10)
+            pdf.drawString(x + 4, y + altura_celula - 14, f"Gráficos da coluna: {coluna}")
+            pdf.drawImage(ImageReader(io.BytesIO(png)), x + 4, y + 4, width=largura_imagem, height=altura_imagem, preserveAspectRatio=True)
+            total += 1
+
+    if total == 0:
+        pdf.setFont("Helvetica", 12)
+        pdf.drawString(margem, altura_pagina - margem - 12, "Nenhum gráfico selecionado ou nenhuma coluna numérica.")
+    pdf.save()
+    print(f"PDF com {total} gráficos salvo em: {pdf_path}")
+
+def exportar_excel(df: pd.DataFrame, caminho: str, notificar: bool = True) -> bool:
+
+    """
+    Exporta um DataFrame como arquivo Excel (.xlsx) para o caminho fornecido.
+    Inclui mensagens de sucesso ou erro e logging.
+    Com notificar=False não abre caixas de diálogo (uso fora da thread da interface).
+    Retorna True se o arquivo foi salvo.
+    """
+
+    try:
+        df.to_excel(caminho, index=False)
+        print(f"Excel salvo em: {caminho}")
+        logging.info(f"Relatório Excel exportado para: {caminho}")
+        if notificar:
+            messagebox.showinfo("Sucesso", "Excel salvo com sucesso!")
+        return True
+        
+    except Exception as e:
+        print(f"Erro ao exportar Excel: {e}")
+        logging.error(f"Erro ao exportar Excel: {e}")
+        if notificar:
+            messagebox.showerror("Erro", f"Erro ao salvar Excel: {e}")
+        return False
+
+def exportar_csv(df: pd.DataFrame, caminho: str, notificar: bool = True) -> bool:
+
+    """
+    Exporta um DataFrame como arquivo CSV para o caminho fornecido.
+    Inclui mensagens de sucesso ou erro e logging.
+    Com notificar=False não abre caixas de diálogo (uso fora da thread da interface).
+    Retorna True se o arquivo foi salvo.
+    """
+
+    try:
+        df.to_csv(caminho, index=False)
+        print(f"CSV salvo em: {caminho}")
+        logging.info(f"Relatório CSV exportado para: {caminho}")
+        if notificar:
+            messagebox.showinfo("Sucesso", "CSV salvo com sucesso!")
+        return True
+    except Exception as e:
+        print(f"Erro ao exportar CSV: {e}")
+        logging.error(f"Erro ao exportar CSV: {e}")
+        if notificar:
+            messagebox.showerror("Erro", f"Erro ao salvar CSV: {e}")
+        return False
+
+def _numerar_linhas_csv_modulo(caminho: str, inicio: int, fim: int, linha_inicio: int, n_campos: int | None) -> np.ndarray:
+    """
+    Versão de numerar_linhas_csv para arquivos com aspas: o módulo csv reconhece campos com quebra
+    de linha, e reader.line_num informa em que linha física cada registro termina.
+    """
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        dados = f.read(fim - inicio)
+    # latin-1 nunca falha e preserva vírgulas, aspas e quebras de linha de UTF-8/latin1/windows-1252
+    leitor = csv.reader(io.StringIO(dados.decode("latin-1"), newline=""))
+    numeros = []
+    limite = None
+    anterior = 0
+    for registro in leitor:
+        linha = linha_inicio + anterior
+        anterior = leitor.line_num
+        if not registro or (len(registro) == 1 and not registro[0].strip()):
+            continue
+        if n_campos is None:
+            n_campos = len(registro)
+            continue
+        if limite is None:
+            # Como no pandas: se a primeira linha de dados tem um campo a mais, ele vira o índice
+            limite = n_campos + 1 if len(registro) == n_campos + 1 else n_campos
+        if len(registro) <= limite:
+            numeros.append(linha)
+    return np.array(numeros, dtype=np.int64)
+
+def numerar_linhas_csv(caminho: str, inicio: int = 0, fim: int = None, linha_inicio: int = 1, n_campos: int = None, tamanho_bloco: int = 16 * 1024 * 1024) -> np.ndarray:
+    """
+    Número da linha física de cada registro de dados de um CSV, descartando o que
+    pd.read_csv(sep=',', on_bad_lines='skip') descarta: linhas em branco (ou só com espaços)
+    e linhas com mais campos que o cabeçalho. Sem aspas no arquivo, a varredura é vetorizada;
+    com aspas, usa o módulo csv (campos podem conter vírgulas e quebras de linha).
+
+    Parâmetros:
+        caminho (str): Arquivo CSV.
+        inicio (int): Byte inicial (deve ser o começo de uma linha).
+        fim (int, opcional): Byte final, exclusivo (padrão: fim do arquivo).
+        linha_inicio (int): Número da linha física que começa no byte 'inicio'.
+        n_campos (int, opcional): Campos do cabeçalho. Se None, a primeira linha não vazia é o cabeçalho.
+        tamanho_bloco (int): Bytes lidos por vez.
+
+    Retorno:
+        np.ndarray: Números de linha (1 = primeira linha do arquivo), na ordem do arquivo.
+    """
+    fim = os.path.getsize(caminho) if fim is None else fim
+    partes = []
+    limite = None
+    base = linha_inicio
+    resto = b""
+    posicao = inicio
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        while True:
+            bloco = f.read(min(tamanho_bloco, fim - posicao))
+            posicao += len(bloco)
+            dados = resto + bloco
+            if b'"' in dados:
+                return _numerar_linhas_csv_modulo(caminho, inicio, fim, linha_inicio, n_campos)
+            if not bloco:
+                if not dados:
+                    break
+                dados += b"\n"  # Última linha sem quebra
+            corte = dados.rfind(b"\n")
+            if corte < 0:
+                resto = dados
+                continue
+            resto = dados[corte + 1:]
+            buffer = np.frombuffer(dados, dtype=np.uint8, count=corte + 1)
+
+            quebras = np.flatnonzero(buffer == 10)
+            inicios = np.concatenate(([0], quebras[:-1] + 1))
+            virgulas = np.flatnonzero(buffer == 44)
+            campos = np.searchsorted(virgulas, quebras) - np.searchsorted(virgulas, inicios) + 1
+            visiveis = np.flatnonzero((buffer != 32) & (buffer != 9) & (buffer != 13) & (buffer != 10))
+            preenchidas = np.searchsorted(visiveis, quebras) > np.searchsorted(visiveis, inicios)
+            numeros = base + np.arange(len(quebras))
+            base += len(quebras)
+
+            candidatas = np.flatnonzero(preenchidas)
+            if n_campos is None:
+                if not len(candidatas):
+                    continue
+                n_campos = int(campos[candidatas[0]])
+                candidatas = candidatas[1:]
+            if limite is None and len(candidatas):
+                limite = n_campos + 1 if campos[candidatas[0]] == n_campos + 1 else n_campos
+            if len(candidatas):
+                partes.append(numeros[candidatas[campos[candidatas] <= limite]])
+            if not bloco:
+                break
+    return np.concatenate(partes) if partes else np.array([], dtype=np.int64)
+
+def linhas_conferidas(caminho: str, n_linhas: int, **opcoes) -> np.ndarray | None:
+    """
+    Numera as linhas do CSV (ver numerar_linhas_csv) e confere com o número de linhas lidas.
+    Se não baterem, a correspondência linha a linha não é confiável: retorna None e avisa,
+    em vez de apontar para linhas erradas.
+    """
+    linhas = numerar_linhas_csv(caminho, **opcoes)
+    if len(linhas) != n_linhas:
+        mensagem = (f"Não foi possível associar as linhas lidas às linhas de '{caminho}' "
+                    f"({n_linhas} lidas, {len(linhas)} numeradas): número da linha e índice não serão gerados.")
+        print(f"Aviso: {mensagem}")
+        logging.warning(mensagem)
+        return None
+    return linhas
+
+def extrair_outliers(df: pd.DataFrame, colunas: List[str] = None, linhas_arquivo: np.ndarray = None) -> pd.DataFrame:
+    """
+    Mantém apenas as linhas marcadas como outlier em alguma coluna, acrescentando:
+    - "linha_arquivo": número da linha no arquivo de origem (1 = cabeçalho), se linhas_arquivo for informado;
+    - "colunas_outlier": colunas que dispararam a marcação, separadas por ";".
+
+    Parâmetros:
+        df (pd.DataFrame): Dados com as colunas "<coluna>_outlier".
+        colunas (List[str], opcional): Colunas consideradas (padrão: todas as que têm marcação).
+        linhas_arquivo (np.ndarray, opcional): Linha física de cada linha do df (ver linhas_conferidas).
+
+    Retorno:
+        pd.DataFrame: Somente as linhas com outlier.
+    """
+    if colunas is None:
+        colunas = [col[:-len("_outlier")] for col in df.columns if col.endswith("_outlier")]
+    colunas = [col for col in colunas if f"{col}_outlier" in df.columns]
+    if not colunas:
+        return df.iloc[:0]
+
+    marcacoes = df[[f"{col}_outlier" for col in colunas]].to_numpy(dtype=bool)
+    posicoes = np.flatnonzero(marcacoes.any(axis=1))
+    saida = df.iloc[posicoes].copy()
+
+    gatilhos = np.full(len(posicoes), "", dtype=object)
+    for i, col in enumerate(colunas):
+        gatilhos = gatilhos + np.where(marcacoes[posicoes, i], f"{col};", "")
+    if linhas_arquivo is not None:
+        saida.insert(0, "linha_arquivo", np.asarray(linhas_arquivo)[posicoes])
+    saida.insert(1 if linhas_arquivo is not None else 0, "colunas_outlier", [gatilho.rstrip(";") for gatilho in gatilhos])
+    return saida
+
+def offsets_das_linhas(caminho: str, linhas: np.ndarray, tamanho_bloco: int = 16 * 1024 * 1024) -> np.ndarray:
+    """
+    Descobre o byte de início de cada linha pedida (numeração a partir de 1), varrendo o arquivo
+    uma vez em blocos e contando quebras de linha de forma vetorizada.
+    """
+    linhas = np.asarray(linhas, dtype=np.int64)
+    offsets = np.full(len(linhas), -1, dtype=np.int64)
+    offsets[linhas == 1] = 0
+    # A linha L começa logo depois da (L-1)-ésima quebra de linha
+    alvo = linhas - 1
+    quebras_anteriores = 0
+    base = 0
+    with open(caminho, "rb") as f:
+        while bloco := f.read(tamanho_bloco):
+            quebras = np.flatnonzero(np.frombuffer(bloco, dtype=np.uint8) == 10)
+            no_bloco = (alvo > quebras_anteriores) & (alvo <= quebras_anteriores + len(quebras))
+            offsets[no_bloco] = base + quebras[alvo[no_bloco] - quebras_anteriores - 1] + 1
+            quebras_anteriores += len(quebras)
+            base += len(bloco)
+    return offsets
+
+def gravar_indice_outliers(caminho_csv: str, linhas: np.ndarray, caminho_indice: str, anexar: bool = False):
+    """
+    Grava um índice auxiliar (.npy) com a linha e o byte de início de cada outlier no CSV de origem,
+    para consulta direta com ler_linhas_por_indice sem reler o arquivo inteiro.
+    Com anexar=True, as entradas são acrescentadas às de um índice existente (modo incremental).
+    """
+    indice = np.zeros(len(linhas), dtype=[("linha", np.int64), ("offset", np.int64)])
+    indice["linha"] = linhas
+    indice["offset"] = offsets_das_linhas(caminho_csv, linhas)
+    if anexar and os.path.isfile(caminho_indice):
+        indice = np.concatenate([np.load(caminho_indice), indice])
+    np.save(caminho_indice, indice)
+    print(f"Índice de outliers salvo em: {caminho_indice}")
+
+def ler_linhas_por_indice(caminho_csv: str, caminho_indice: str, posicoes: List[int] = None) -> List[str]:
+    """
+    Lê do CSV de origem as linhas apontadas pelo índice de outliers (todas, ou só as posições pedidas),
+    usando seek direto no byte de cada linha.
+    """
+    indice = np.load(caminho_indice, mmap_mode="r")
+    selecionadas = indice if posicoes is None else indice[posicoes]
+    linhas = []
+    with open(caminho_csv, "rb") as f:
+        for offset in selecionadas["offset"]:
+            f.seek(int(offset))
+            linhas.append(f.readline().decode("utf-8", errors="replace").rstrip("\r\n"))
+    return linhas
+
+def _exportar_medindo(nome: str, funcao_exportar, df: pd.DataFrame, caminho: str) -> bool:
+    with medir_etapa(nome, linhas=len(df)) as etapa:
+        salvo = funcao_exportar(df, caminho, notificar=False)
+        etapa["bytes"] = os.path.getsize(caminho) if salvo and os.path.isfile(caminho) else 0
+    return salvo
+
+def exportar_relatorios(df: pd.DataFrame, caminho_saida: str, relatorios: dict, opcoes_graficos: dict, caminho_origem: str = None, linhas_arquivo: np.ndarray = None) -> List[str]:
+    """
+    Gera os relatórios selecionados. Quando mais de um é pedido, CSV e Excel são gravados em
+    threads enquanto o PDF é montado na thread atual (o matplotlib/pyplot não é seguro entre threads).
+
+    Com relatorios["somente_outliers"], CSV e Excel recebem só as linhas marcadas (ver extrair_outliers)
+    em relatorio_outliers.csv/.xlsx e, se caminho_origem for um CSV, é gravado o índice
+    relatorio_outliers_indice.npy (ver gravar_indice_outliers). O PDF continua usando todos os dados.
+    O número da linha vem de linhas_arquivo ou, na falta, de linhas_conferidas(caminho_origem);
+    se a numeração não bater com o df, a coluna linha_arquivo e o índice são omitidos.
+
+    Parâmetros:
+        df (pd.DataFrame): Dados analisados.
+        caminho_saida (str): Pasta de saída.
+        relatorios (dict): Relatórios a gerar (ex: {"csv": True, "excel": False, "pdf": True, "somente_outliers": False}).
+        opcoes_graficos (dict): Opções de gráfico repassadas a gerar_graficos_pdf.
+        caminho_origem (str, opcional): Arquivo de entrada, usado no índice de outliers.
+        linhas_arquivo (np.ndarray, opcional): Linha física de cada linha do df, se já conhecida.
+
+    Retorno:
+        List[str]: Nomes dos relatórios que falharam (vazia se todos foram salvos).
+    """
+    df_tabela = df
+    sufixo = ""
+    if relatorios.get("somente_outliers"):
+        origem_csv = caminho_origem and Path(caminho_origem).suffix.lower() == ".csv"
+        with medir_etapa("extrair_outliers", linhas=len(df)) as etapa:
+            if linhas_arquivo is None and origem_csv:
+                linhas_arquivo = linhas_conferidas(caminho_origem, len(df))
+            df_tabela = extrair_outliers(df, linhas_arquivo=linhas_arquivo)
+            etapa["outliers"] = len(df_tabela)
+        sufixo = "_outliers"
+        if (relatorios.get("csv") or relatorios.get("excel")) and origem_csv and linhas_arquivo is not None:
+            gravar_indice_outliers(caminho_origem, df_tabela["linha_arquivo"].to_numpy(), os.path.join(caminho_saida, "relatorio_outliers_indice.npy"))
+
+    tarefas = []
+    if relatorios.get("csv"):
+        tarefas.append(("exportar_csv", exportar_csv, os.path.join(caminho_saida, f"relatorio{sufixo}.csv")))
+    if relatorios.get("excel"):
+        tarefas.append(("exportar_excel", exportar_excel, os.path.join(caminho_saida, f"relatorio{sufixo}.xlsx")))
+
+    falhas = []
+    with ThreadPoolExecutor(max_workers=max(len(tarefas), 1)) as executor:
+        futuros = {nome: executor.submit(_exportar_medindo, nome, funcao, df_tabela, caminho) for nome, funcao, caminho in tarefas}
+
+        if relatorios.get("pdf"):
+            try:
+                with medir_etapa("exportar_pdf", linhas=len(df)):
+                    gerar_graficos_pdf(df, opcoes_graficos, caminho_saida)
+            except Exception as e:
+                print(f"Erro ao gerar PDF: {e}")
+                logging.error(f"Erro ao gerar PDF: {e}")
+                falhas.append("exportar_pdf")
+
+        for nome, futuro in futuros.items():
+            if not futuro.result():
+                falhas.append(nome)
+
+    return falhas
+
+def limites_dos_chunks(n_linhas: int, bytes_por_linha: float, n_minimo: int = 1, bytes_por_chunk: int = BYTES_POR_CHUNK) -> List[Tuple[int, int]]:
+    """
+    Calcula os intervalos [inicio, fim) de cada chunk. O número de chunks vem do tamanho em bytes
+    (chunks de ~bytes_por_chunk cabem no cache do processador), com pelo menos n_minimo chunks para
+    ocupar todos os workers. Os intervalos são determinísticos, nunca vazios e diferem em no máximo uma linha.
+
+    Parâmetros:
+        n_linhas (int): Total de linhas.
+        bytes_por_linha (float): Tamanho médio de uma linha na memória.
+        n_minimo (int): Quantidade mínima de chunks (ex: número de workers).
+        bytes_por_chunk (int): Tamanho alvo de cada chunk.
+
+    Retorno:
+        List[Tuple[int, int]]: Intervalos em ordem; lista vazia se não houver linhas.
+    """
+    if n_linhas <= 0:
+        return []
+    n_chunks = max(int(np.ceil(n_linhas * bytes_por_linha / bytes_por_chunk)), n_minimo, 1)
+    n_chunks = min(n_chunks, n_linhas)
+    return [(i * n_linhas // n_chunks, (i + 1) * n_linhas // n_chunks) for i in range(n_chunks)]
+
+def _limites_do_dataframe(df: pd.DataFrame, n_minimo: int, bytes_por_chunk: int) -> List[Tuple[int, int]]:
+    bytes_por_linha = df.memory_usage(index=False).sum() / len(df) if len(df) else 0
+    return limites_dos_chunks(len(df), bytes_por_linha, n_minimo, bytes_por_chunk)
+
+def dividir_em_chunks(df: pd.DataFrame, n_chunks: int = 1, bytes_por_chunk: int = BYTES_POR_CHUNK) -> List[pd.DataFrame]:
+    """
+    Divide o DataFrame em fatias contíguas (ver limites_dos_chunks). Cada fatia é um iloc[inicio:fim],
+    que não copia os dados; n_chunks é o mínimo, não um número fixo.
+    """
+    return [df.iloc[inicio:fim] for inicio, fim in _limites_do_dataframe(df, n_chunks, bytes_por_chunk)]
+
+def montar_resultado_chunks(df: pd.DataFrame, limites: List[Tuple[int, int]], resultados) -> pd.DataFrame:
+    """
+    Monta o resultado final gravando cada chunk na sua posição em arrays pré-alocados, sem pd.concat.
+    Os resultados podem chegar em qualquer ordem e são liberados assim que copiados; a saída mantém
+    a ordem das linhas e reaproveita o índice original.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame de entrada (fornece o índice e o número de linhas).
+        limites (List[Tuple[int, int]]): Intervalos usados na divisão (ver limites_dos_chunks).
+        resultados: Iterável de (indice_do_chunk, DataFrame com uma linha por linha do chunk).
+
+    Retorno:
+        pd.DataFrame: Colunas na ordem do primeiro resultado recebido, com o índice de df.
+    """
+    colunas = None
+    saida = {}
+    pedacos = {}  # Colunas com dtype de extensão (ex: category, string): juntadas no final
+    for indice, resultado in resultados:
+        inicio, fim = limites[indice]
+        if len(resultado) != fim - inicio:
+            raise ValueError(f"O chunk {indice} devolveu {len(resultado)} linhas, esperado {fim - inicio}.")
+        if colunas is None:
+            colunas = list(resultado.columns)
+        for coluna in colunas:
+            valores = resultado[coluna]
+            if coluna in pedacos or not isinstance(valores.dtype, np.dtype):
+                pedacos.setdefault(coluna, {})[indice] = valores.array
+                continue
+            buffer = saida.get(coluna)
+            if buffer is None:
+                buffer = saida[coluna] = np.empty(len(df), dtype=valores.dtype)
+            elif buffer.dtype != valores.dtype:
+                # Ex: um chunk com nulos vira float64 enquanto os outros são int64
+                buffer = saida[coluna] = buffer.astype(np.result_type(buffer.dtype, valores.dtype))
+            buffer[inicio:fim] = valores.to_numpy()
+
+    if colunas is None:
+        return df.iloc[:0]
+    for coluna, partes in pedacos.items():
+        if coluna in saida:
+            # O dtype mudou de numpy para extensão no meio do caminho: os chunks já gravados são reaproveitados
+            partes.update({i: pd.array(saida.pop(coluna)[inicio:fim]) for i, (inicio, fim) in enumerate(limites) if i not in partes})
+        saida[coluna] = pd.concat([pd.Series(partes[i]) for i in range(len(limites))], ignore_index=True).array
+    return pd.DataFrame({coluna: saida[coluna] for coluna in colunas}, index=df.index, copy=False)
+
+def processar_chunk(chunk: pd.DataFrame, metodo: str, colunas: list) -> pd.DataFrame:
+    chunk, _ = detectar_outliers(chunk, metodo, colunas)
+    return chunk
+
+def executar_chunk_cronometrado(funcao_processamento, indice: int, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, dict]:
+    """
+    Executa funcao_processamento sobre um chunk e devolve o resultado junto com o tempo gasto pelo worker.
+    Fica no nível do módulo para poder ser enviada a um ProcessPoolExecutor.
+    """
+    inicio_parede = time.perf_counter()
+    inicio_cpu = time.process_time()
+    resultado = funcao_processamento(chunk)
+    return resultado, {
+        "chunk": indice,
+        "linhas": len(chunk),
+        "tempo_parede_s": round(time.perf_counter() - inicio_parede, 6),
+        "tempo_cpu_s": round(time.process_time() - inicio_cpu, 6),
+        "pid": os.getpid(),
+        "thread": threading.current_thread().name
+    }
+
+def processar_particionado(df: pd.DataFrame, funcao_processamento, executor, n_workers: int, etapa: str, bytes_por_chunk: int = BYTES_POR_CHUNK) -> pd.DataFrame:
+    """
+    Divide o DataFrame (ver dividir_em_chunks), envia os chunks ao executor e monta a saída
+    com montar_resultado_chunks conforme os chunks terminam.
+    """
+    limites = _limites_do_dataframe(df, n_workers, bytes_por_chunk)
+    if not limites:
+        return funcao_processamento(df)
+    futuros = {
+        executor.submit(executar_chunk_cronometrado, funcao_processamento, indice, df.iloc[inicio:fim]): indice
+        for indice, (inicio, fim) in enumerate(limites)
+    }
+    tempos = []
+
+    def concluidos():
+        for futuro in as_completed(futuros):
+            resultado, tempo = futuro.result()
+            tempos.append(tempo)
+            yield futuros[futuro], resultado
+
+    resultado = montar_resultado_chunks(df, limites, concluidos())
+    registrar_tempos_chunks(etapa, sorted(tempos, key=lambda tempo: tempo["chunk"]))
+    return resultado
+
+def processar_em_threads(df: pd.DataFrame, funcao_processamento, n_threads=4):
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        return processar_particionado(df, funcao_processamento, executor, n_threads, "threads")
+
+def processar_em_processos(df: pd.DataFrame, funcao_processamento, n_chunks=4):
+    with ProcessPoolExecutor(max_workers=n_chunks) as executor:
+        return processar_particionado(df, funcao_processamento, executor, n_chunks, "processos")
+
+def funcao_processamento_outliers(chunk: pd.DataFrame, metodo: str, colunas: list, limites: dict = None) -> pd.DataFrame:
+    return detectar_outliers(chunk, metodo, colunas, limites)[0]
+
+def estado_coluna(serie: pd.Series, tamanho_amostra: int = TAMANHO_AMOSTRA_ESTADO, rng: np.random.Generator = None) -> dict:
+    """
+    Resume uma coluna numérica em um estado mesclável: contagem, média, M2 (soma dos quadrados
+    dos desvios), soma, mínimo, máximo e uma amostra uniforme (reservatório) para estimar quartis.
+
+    Parâmetros:
+        serie (pd.Series): Valores da coluna (nulos são ignorados).
+        tamanho_amostra (int): Tamanho máximo do reservatório.
+        rng (np.random.Generator): Gerador aleatório (opcional).
+
+    Retorno:
+        dict: Estado da coluna, serializável em JSON.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    valores = pd.to_numeric(serie, errors='coerce').dropna().to_numpy(dtype=float)
+    n = len(valores)
+    if n == 0:
+        return {"n": 0, "media": 0.0, "m2": 0.0, "soma": 0.0, "minimo": None, "maximo": None, "amostra": []}
+
+    media = float(valores.mean())
+    amostra = valores if n <= tamanho_amostra else rng.choice(valores, tamanho_amostra, replace=False)
+    return {
+        "n": n,
+        "media": media,
+        "m2": float(((valores - media) ** 2).sum()),
+        "soma": float(valores.sum()),
+        "minimo": float(valores.min()),
+        "maximo": float(valores.max()),
+        "amostra": amostra.tolist()
+    }
+
+def mesclar_estados_coluna(a: dict, b: dict, tamanho_amostra: int = TAMANHO_AMOSTRA_ESTADO, rng: np.random.Generator = None) -> dict:
+    """
+    Combina dois estados de coluna como se tivessem sido calculados sobre a união dos dados.
+    Média e M2 usam a fórmula de Chan; o reservatório é reamostrado proporcionalmente a cada lado.
+
+    Parâmetros:
+        a (dict), b (dict): Estados gerados por estado_coluna.
+        tamanho_amostra (int): Tamanho máximo do reservatório resultante.
+        rng (np.random.Generator): Gerador aleatório (opcional).
+
+    Retorno:
+        dict: Estado combinado.
+    """
+    if a["n"] == 0:
+        return dict(b)
+    if b["n"] == 0:
+        return dict(a)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    n = a["n"] + b["n"]
+    delta = b["media"] - a["media"]
+    media = a["media"] + delta * b["n"] / n
+    m2 = a["m2"] + b["m2"] + delta ** 2 * a["n"] * b["n"] / n
+
+    amostra_a = np.asarray(a["amostra"], dtype=float)
+    amostra_b = np.asarray(b["amostra"], dtype=float)
+    if len(amostra_a) + len(amostra_b) <= tamanho_amostra:
+        amostra = np.concatenate([amostra_a, amostra_b])
+    else:
+        # Cada posição do reservatório vem de 'a' com probabilidade proporcional ao volume que 'a' representa
+        k_a = int(rng.binomial(tamanho_amostra, a["n"] / n))
+        k_a = min(max(k_a, tamanho_amostra - len(amostra_b)), len(amostra_a))
+        amostra = np.concatenate([
+            rng.choice(amostra_a, k_a, replace=False),
+            rng.choice(amostra_b, tamanho_amostra - k_a, replace=False)
+        ])
+
+    return {
+        "n": n,
+        "media": media,
+        "m2": m2,
+        "soma": a["soma"] + b["soma"],
+        "minimo": min(a["minimo"], b["minimo"]),
+        "maximo": max(a["maximo"], b["maximo"]),
+        "amostra": amostra.tolist()
+    }
+
+def limites_do_estado(estado: dict, metodo: str = "IQR") -> Tuple[float, float]:
+    """
+    Calcula os limites de outlier a partir de um estado de coluna.
+    Para Z-Score o resultado é exato; para IQR os quartis vêm do reservatório
+    (exatos enquanto a coluna couber inteira na amostra).
+    """
+    if metodo == "IQR":
+        return calcular_limites_outliers(pd.Series(estado["amostra"], dtype=float), metodo)
+    elif metodo == "Z-Score":
+        if estado["n"] < 2:
+            return float("nan"), float("nan")
+        desvio = (estado["m2"] / (estado["n"] - 1)) ** 0.5
+        limite_z = PARAMETROS_METODOS["Z-Score"]["limite_z"]
+        return estado["media"] - limite_z * desvio, estado["media"] + limite_z * desvio
+    raise ValueError("Método inválido. Use 'IQR' ou 'Z-Score'.")
+
+def estatisticas_do_estado(estados: dict) -> dict:
+    """
+    Converte estados de coluna no mesmo formato retornado por calcular_estatisticas.
+    """
+    return {
+        coluna: {
+            'media': estado["media"] if estado["n"] else float("nan"),
+            'soma': estado["soma"],
+            'minimo': estado["minimo"] if estado["n"] else float("nan"),
+            'maximo': estado["maximo"] if estado["n"] else float("nan"),
+            'contagem': estado["n"]
+        }
+        for coluna, estado in estados.items()
+    }
+
+def _assinatura_arquivo(caminho: str, offset: int, n_blocos: int = BLOCOS_ASSINATURA, tamanho_bloco: int = BYTES_BLOCO_ASSINATURA) -> dict:
+    """
+    Identifica o trecho [0, offset) do arquivo: inode e dispositivo (arquivo substituído por outro) e um hash
+    do trecho inteiro, se couber em n_blocos * tamanho_bloco, ou de n_blocos blocos igualmente espaçados
+    de [0, offset), incluindo o início e o fim. Se algo mudar, o arquivo foi reescrito e não apenas acrescido.
+    Em arquivos maiores que a amostra, uma edição no mesmo inode fora dos blocos amostrados não é percebida.
+    """
+    info = os.stat(caminho)
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        if offset <= n_blocos * tamanho_bloco:
+            resumo.update(f.read(offset))
+        else:
+            for posicao in np.linspace(0, offset - tamanho_bloco, n_blocos).astype(np.int64):
+                f.seek(int(posicao))
+                resumo.update(f.read(tamanho_bloco))
+    return {
+        "inode": info.st_ino,
+        "dispositivo": info.st_dev,
+        "trecho": resumo.hexdigest()
+    }
+
+def ler_trecho_csv(caminho: str, inicio: int = 0, cabecalho: List[str] = None) -> Tuple[pd.DataFrame, int]:
+    """
+    Lê as linhas completas de um CSV a partir do byte 'inicio'.
+    Uma última linha sem quebra de linha é ignorada, pois ainda pode estar sendo escrita.
+
+    Parâmetros:
+        caminho (str): Caminho do arquivo CSV.
+        inicio (int): Byte a partir do qual ler (0 = arquivo inteiro, com cabeçalho).
+        cabecalho (List[str]): Nomes das colunas, obrigatório quando inicio > 0.
+
+    Retorno:
+        tuple: (DataFrame lido, byte em que a leitura terminou).
+    """
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        dados = f.read()
+
+    fim_linha = dados.rfind(b"\n")
+    if fim_linha < 0:
+        dados = b""
+    else:
+        dados = dados[:fim_linha + 1]
+    offset_final = inicio + len(dados)
+
+    if not dados.strip():
+        return pd.DataFrame(columns=cabecalho), offset_final
+
+    opcoes = {"sep": ",", "on_bad_lines": "skip"}
+    if inicio > 0:
+        opcoes.update(header=None, names=cabecalho)
+
+    for encoding in ("utf-8", "latin1"):
+        try:
+            return pd.read_csv(io.BytesIO(dados), encoding=encoding, **opcoes), offset_final
+        except UnicodeDecodeError:
+            print(f"{encoding} falhou. Tentando a próxima codificação...")
+    return pd.read_csv(io.BytesIO(dados), encoding='windows-1252', **opcoes), offset_final
+
+def _caminho_estado_incremental(caminho_csv: str, pasta_saida: str) -> str:
+    return os.path.join(pasta_saida, f"{Path(caminho_csv).stem}{SUFIXO_ESTADO_INCREMENTAL}")
+
+def carregar_estado_incremental(caminho_csv: str, pasta_saida: str) -> dict | None:
+    """
+    Lê o estado salvo pela última execução incremental, ou None se não existir ou estiver corrompido.
+    """
+    caminho_estado = _caminho_estado_incremental(caminho_csv, pasta_saida)
+    if not os.path.isfile(caminho_estado):
+        return None
+    try:
+        with open(caminho_estado, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Estado incremental ignorado ({caminho_estado}): {e}")
+        return None
+
+def salvar_estado_incremental(caminho_csv: str, pasta_saida: str, estado: dict):
+    """
+    Grava o estado incremental de forma atômica (arquivo temporário + rename).
+    """
+    caminho_estado = _caminho_estado_incremental(caminho_csv, pasta_saida)
+    caminho_tmp = caminho_estado + ".tmp"
+    with open(caminho_tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(caminho_tmp, caminho_estado)
+
+def _motivo_execucao_completa(estado: dict | None, caminho_csv: str, metodo: str, colunas: list) -> str | None:
+    """
+    Retorna o motivo pelo qual o estado salvo não pode ser reaproveitado, ou None se pode.
+    """
+    if estado is None:
+        return "nenhum estado anterior"
+    if estado.get("metodo") != metodo or estado.get("colunas") != list(colunas):
+        return "método ou colunas diferentes da última execução"
+    if os.path.getsize(caminho_csv) < estado["offset"]:
+        return "arquivo menor que na última execução"
+    assinatura = _assinatura_arquivo(caminho_csv, estado["offset"])
+    anterior = estado["assinatura"]
+    if (assinatura["inode"], assinatura["dispositivo"]) != (anterior.get("inode"), anterior.get("dispositivo")):
+        return "arquivo substituído por outro"
+    if assinatura != anterior:
+        return "conteúdo já processado foi alterado"
+    return None
+
+def _contar_quebras(caminho: str, inicio: int, fim: int, tamanho_bloco: int = 16 * 1024 * 1024) -> int:
+    """
+    Conta as quebras de linha entre os bytes inicio (inclusive) e fim (exclusive).
+    """
+    total = 0
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        restante = fim - inicio
+        while restante > 0 and (bloco := f.read(min(tamanho_bloco, restante))):
+            total += bloco.count(b"\n")
+            restante -= len(bloco)
+    return total
+
+def processar_incremental(caminho_csv: str, pasta_saida: str, colunas: list, metodo: str, tolerancia: float = TOLERANCIA_LIMITES, numerar_linhas: bool = False) -> Tuple[pd.DataFrame | None, dict, bool, np.ndarray | None]:
+    """
+    Analisa um CSV que só cresce reaproveitando o estado da execução anterior.
+    Apenas as linhas acrescentadas desde o último offset são lidas e marcadas com os limites vigentes.
+    Se o arquivo foi reescrito, se não há estado, ou se os limites recalculados se moverem mais que
+    'tolerancia' (fração da largura do intervalo), faz uma execução completa e regrava o estado.
+
+    Parâmetros:
+        caminho_csv (str): Arquivo de entrada (somente .csv).
+        pasta_saida (str): Pasta onde o estado incremental é salvo.
+        colunas (list): Colunas numéricas analisadas.
+        metodo (str): "IQR" ou "Z-Score".
+        tolerancia (float): Deslocamento relativo máximo dos limites antes de remarcar tudo.
+        numerar_linhas (bool): Calcula a linha física de cada linha analisada (ver linhas_conferidas).
+
+    Retorno:
+        tuple:
+            - pd.DataFrame | None: Linhas analisadas nesta execução (só as novas, se incremental), ou None em erro.
+            - dict: Estatísticas acumuladas no formato de calcular_estatisticas.
+            - bool: True se a execução foi incremental, False se foi completa.
+            - np.ndarray | None: Linha física de cada linha do DataFrame, se pedida e confiável.
+    """
+    estado = carregar_estado_incremental(caminho_csv, pasta_saida)
+    motivo = _motivo_execucao_completa(estado, caminho_csv, metodo, colunas)
+
+    if motivo is None:
+        df_novo, offset = ler_trecho_csv(caminho_csv, estado["offset"], estado["cabecalho"])
+        valido, df_novo, relatorio_validacao = validar_estrutura_dados(df_novo, colunas, interromper_em_erro=True)
+        print(formatar_relatorio_validacao(relatorio_validacao, relatorio_validacao["problemas"]))
+        if not valido:
+            return None, {}, True, None
+        df_novo = filtrar_colunas(df_novo, colunas)
+        if df_novo is None:
+            return None, {}, True, None
+
+        estados = {
+            col: mesclar_estados_coluna(estado["estados"][col], estado_coluna(df_novo[col]))
+            for col in colunas
+        }
+        limites = {col: tuple(lim) for col, lim in estado["limites"].items()}
+
+        for col in colunas:
+            novo_inf, novo_sup = limites_do_estado(estados[col], metodo)
+            antigo_inf, antigo_sup = limites[col]
+            largura = abs(antigo_sup - antigo_inf) or 1.0
+            if abs(novo_inf - antigo_inf) > tolerancia * largura or abs(novo_sup - antigo_sup) > tolerancia * largura:
+                motivo = f"limites da coluna '{col}' mudaram além da tolerância"
+                break
+
+        if motivo is None:
+            df_novo, _ = detectar_outliers(df_novo, metodo, colunas, limites=limites)
+            # Estados gravados antes da numeração de linhas não têm linha_offset: conta uma vez
+            linha_offset = estado.get("linha_offset") or 1 + _contar_quebras(caminho_csv, 0, estado["offset"])
+            linhas_arquivo = None
+            if numerar_linhas:
+                linhas_arquivo = linhas_conferidas(caminho_csv, len(df_novo), inicio=estado["offset"], fim=offset,
+                                                   linha_inicio=linha_offset, n_campos=len(estado["cabecalho"]))
+            estado.update(
+                linha_offset=linha_offset + _contar_quebras(caminho_csv, estado["offset"], offset),
+                offset=offset,
+                linhas=estado["linhas"] + len(df_novo),
+                assinatura=_assinatura_arquivo(caminho_csv, offset),
+                estados=estados
+            )
+            salvar_estado_incremental(caminho_csv, pasta_saida, estado)
+            print(f"Execução incremental: {len(df_novo)} linhas novas analisadas.")
+            logging.info(f"Execução incremental de {caminho_csv}: {len(df_novo)} linhas novas (offset {offset}).")
+            return df_novo, estatisticas_do_estado(estados), True, linhas_arquivo
+
+    print(f"Execução completa ({motivo}).")
+    logging.info(f"Execução incremental de {caminho_csv} caiu para completa: {motivo}.")
+
+    df, offset = ler_trecho_csv(caminho_csv)
+    cabecalho = df.columns.tolist()
+    valido, df, relatorio_validacao = validar_estrutura_dados(df, colunas, interromper_em_erro=True)
+    print(formatar_relatorio_validacao(relatorio_validacao, relatorio_validacao["problemas"]))
+    if not valido:
+        return None, {}, False, None
+    df = filtrar_colunas(df, colunas)
+    if df is None:
+        return None, {}, False, None
+
+    limites = {col: calcular_limites_outliers(df[col], metodo) for col in colunas}
+    df, _ = detectar_outliers(df, metodo, colunas, limites=limites)
+    estados = {col: estado_coluna(df[col]) for col in colunas}
+
+    salvar_estado_incremental(caminho_csv, pasta_saida, {
+        "metodo": metodo,
+        "colunas": list(colunas),
+        "cabecalho": cabecalho,
+        "offset": offset,
+        "linha_offset": 1 + _contar_quebras(caminho_csv, 0, offset),
+        "linhas": len(df),
+        "assinatura": _assinatura_arquivo(caminho_csv, offset),
+        "limites": {col: [float(lim_inf), float(lim_sup)] for col, (lim_inf, lim_sup) in limites.items()},
+        "estados": estados
+    })
+    linhas_arquivo = linhas_conferidas(caminho_csv, len(df), fim=offset) if numerar_linhas else None
+    return df, calcular_estatisticas(df), False, linhas_arquivo
+
+def impressao_digital_arquivo(caminho: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """
+    Calcula o hash BLAKE2b do conteúdo do arquivo, lendo em blocos.
+    Identifica os dados independentemente do nome ou da data de modificação.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(caminho, "rb") as f:
+        while bloco := f.read(tamanho_bloco):
+            h.update(bloco)
+    return h.hexdigest()
+
+def chave_cache_resultados(impressao_digital: str, colunas: List[str], metodo: str, origem: str = "pipeline") -> str:
+    """
+    Monta a chave do cache a partir do conteúdo, das colunas, do método, dos parâmetros do método
+    e do caminho de execução que gerou o resultado ("pipeline" ou "servico"): os caminhos não
+    calculam exatamente da mesma forma, então a resposta de uma chave não depende de qual preencheu o cache.
+    """
+    parametros = {
+        "versao": VERSAO_CACHE,
+        "colunas": list(colunas),
+        "metodo": metodo,
+        "parametros": PARAMETROS_METODOS.get(metodo),
+        "origem": origem
+    }
+    return hashlib.blake2b((impressao_digital + json.dumps(parametros, sort_keys=True)).encode("utf-8"), digest_size=20).hexdigest()
+
+def _caminho_cache(chave: str) -> Path:
+    return Path(DIRETORIO_CACHE) / f"{chave}.npz"
+
+def carregar_resultado_cache(chave: str) -> dict | None:
+    """
+    Busca um resultado no cache. Um acerto atualiza a data de acesso do arquivo (ordem LRU).
+
+    Retorno:
+        dict | None: {"linhas", "flags": {coluna: array bool}, "estatisticas", "limites"} ou None se não houver.
+    """
+    caminho = _caminho_cache(chave)
+    if not caminho.is_file():
+        return None
+    try:
+        with np.load(caminho) as dados:
+            metadados = json.loads(dados["metadados"].tobytes().decode("utf-8"))
+            linhas = metadados["linhas"]
+            flags = {
+                coluna: np.unpackbits(dados[f"flags_{i}"], count=linhas).astype(bool)
+                for i, coluna in enumerate(metadados["colunas"])
+            }
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Entrada de cache ignorada ({caminho}): {e}")
+        return None
+
+    try:
+        os.utime(caminho)
+    except FileNotFoundError:
+        pass  # Removida por outra execução depois da leitura: o conteúdo já foi carregado
+    return {
+        "linhas": linhas,
+        "flags": flags,
+        "estatisticas": metadados["estatisticas"],
+        "limites": metadados["limites"]
+    }
+
+def salvar_resultado_cache(chave: str, df: pd.DataFrame, colunas: List[str], estatisticas: dict, limites: dict = None, limite_mb: float = LIMITE_CACHE_MB):
+    """
+    Grava no cache as marcações de outlier (1 bit por linha), as estatísticas e os limites,
+    e remove as entradas menos usadas recentemente se o cache passar de limite_mb.
+    """
+    colunas_marcadas = [col for col in colunas if f"{col}_outlier" in df.columns]
+    metadados = {
+        "linhas": len(df),
+        "colunas": colunas_marcadas,
+        "estatisticas": estatisticas,
+        "limites": {col: [float(lim_inf), float(lim_sup)] for col, (lim_inf, lim_sup) in (limites or {}).items()}
+    }
+    arrays = {
+        f"flags_{i}": np.packbits(df[f"{col}_outlier"].to_numpy(dtype=bool))
+        for i, col in enumerate(colunas_marcadas)
+    }
+    arrays["metadados"] = np.frombuffer(json.dumps(metadados, default=float).encode("utf-8"), dtype=np.uint8)
+
+    caminho_tmp = None
+    try:
+        os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+        caminho = _caminho_cache(chave)
+        # Temporário único e fora do padrão "*.npz": outras execuções não o removem nem o contam
+        with tempfile.NamedTemporaryFile(dir=DIRETORIO_CACHE, prefix=f"{chave}.", suffix=".tmp", delete=False) as f:
+            caminho_tmp = f.name
+            np.savez_compressed(f, **arrays)
+        os.replace(caminho_tmp, caminho)
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar o cache: {e}")
+        if caminho_tmp:
+            Path(caminho_tmp).unlink(missing_ok=True)
+        return
+
+    _limitar_tamanho_cache(limite_mb * 1024 * 1024)
+
+def _limitar_tamanho_cache(limite_bytes: float):
+    """
+    Remove as entradas acessadas há mais tempo até o cache caber em limite_bytes.
+    Outras execuções podem remover entradas ao mesmo tempo: arquivos que somem são ignorados.
+    """
+    entradas = []
+    for entrada in Path(DIRETORIO_CACHE).glob("*.npz"):
+        try:
+            info = entrada.stat()
+        except FileNotFoundError:
+            continue
+        entradas.append((info.st_mtime, info.st_size, entrada))
+    entradas.sort(key=lambda item: item[0])
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, entrada in entradas:
+        if total <= limite_bytes:
+            break
+        total -= tamanho
+        entrada.unlink(missing_ok=True)
+
+def executar_com_cache(resultado: dict, caminho_csv: str, caminho_saida: str, colunas: List[str], relatorios: dict, opcoes_graficos: dict) -> dict | None:
+    """
+    Gera os relatórios a partir de um resultado em cache: os dados são relidos apenas para exportação,
+    sem validar novamente, detectar outliers ou recalcular estatísticas.
+    """
+    precisa_dados = relatorios.get("csv") or relatorios.get("excel") or relatorios.get("pdf")
+    if precisa_dados:
+        with medir_etapa("carregar", bytes=os.path.getsize(caminho_csv)) as etapa:
+            df = carregar_arquivo_csv(caminho_csv)
+            etapa["linhas"] = 0 if df is None else len(df)
+        if df is None:
+            return None
+
+        df = filtrar_colunas(df, colunas)
+        if df is None or len(df) != resultado["linhas"]:
+            print("Aviso: cache incompatível com os dados lidos; refazendo a análise.")
+            return None
+
+        for col in colunas:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        for col, flags in resultado["flags"].items():
+            df[f"{col}_outlier"] = flags
+
+        falhas = exportar_relatorios(df, caminho_saida, relatorios, opcoes_graficos, caminho_csv)
+        if falhas:
+            messagebox.showerror("Erro", f"Falha ao gerar: {', '.join(falhas)}. Veja o log para detalhes.")
+
+    return resultado["estatisticas"]
+
+def _detectar_codificacao(caminho: str, tamanho_amostra: int = 4 * 1024 * 1024) -> str:
+    """
+    Escolhe a codificação para leitura em chunks: UTF-8 se o início do arquivo decodifica, senão latin1.
+    """
+    with open(caminho, "rb") as f:
+        amostra = f.read(tamanho_amostra)
+    try:
+        # Um caractere multibyte pode ter sido cortado no fim da amostra
+        codecs.getincrementaldecoder("utf-8")().decode(amostra, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        print("UTF-8 falhou. Usando latin1...")
+        return "latin1"
+
+def _ler_chunks_para_fila(caminho: str, linhas_por_chunk: int, fila: queue.Queue, parar: threading.Event):
+    """
+    Thread leitora: coloca chunks do CSV na fila limitada e termina com FIM_FILA.
+    Se a leitura falhar, a exceção é enviada pela fila para o consumidor.
+    """
+    try:
+        codificacao = _detectar_codificacao(caminho)
+        leitor = pd.read_csv(caminho, sep=',', on_bad_lines='skip', encoding=codificacao,
+                             encoding_errors='replace', chunksize=linhas_por_chunk)
+        for chunk in leitor:
+            if parar.is_set():
+                break
+            fila.put(chunk)
+    except Exception as e:
+        fila.put(e)
+    finally:
+        fila.put(FIM_FILA)
+
+def _escrever_chunks_csv(caminho: str, fila: queue.Queue, erros: list):
+    """
+    Thread escritora: grava no CSV de saída cada chunk recebido, na ordem, até FIM_FILA.
+    """
+    try:
+        with open(caminho, "w", encoding="utf-8", newline="") as f:
+            primeiro = True
+            while (chunk := fila.get()) is not FIM_FILA:
+                chunk.to_csv(f, header=primeiro, index=False)
+                primeiro = False
+    except Exception as e:
+        erros.append(e)
+        # Esvazia a fila para não bloquear o produtor
+        while fila.get() is not FIM_FILA:
+            pass
+
+def executar_pipeline_sobreposto(caminho_csv: str, caminho_saida: str, colunas: List[str], metodo: str, relatorios: dict, opcoes_graficos: dict, linhas_por_chunk: int = LINHAS_POR_CHUNK_FLUXO, tamanho_fila: int = TAMANHO_FILA_FLUXO, n_workers: int = N_CHUNKS, chave_cache: str = None) -> dict | None:
+    """
+    Versão do pipeline que sobrepõe disco e CPU usando filas limitadas entre as etapas:
+    1. Uma thread lê o chunk N+1 enquanto o chunk N é validado e filtrado.
+    2. Com os limites de outlier calculados sobre todos os dados, os chunks são marcados por um pool de
+       threads enquanto uma thread escritora grava no relatorio.csv os chunks já marcados.
+    3. Excel e PDF são gerados em paralelo (ver exportar_relatorios).
+    O tamanho das filas limita a memória extra e faz a etapa mais rápida esperar a mais lenta.
+    Se chave_cache for informada, o resultado é gravado no cache de resultados.
+
+    Retorno:
+        dict | None: Estatísticas calculadas, ou None se o pipeline foi interrompido.
+    """
+    fila_leitura = queue.Queue(maxsize=tamanho_fila)
+    parar = threading.Event()
+    leitora = threading.Thread(target=_ler_chunks_para_fila, args=(caminho_csv, linhas_por_chunk, fila_leitura, parar), daemon=True)
+
+    chunks = []
+    relatorio_validacao = None
+    esquema = None  # Tipos decididos no primeiro chunk e aplicados aos demais
+    memoria_antes = memoria_depois = 0
+    with medir_etapa("carregar_validar", bytes=os.path.getsize(caminho_csv)) as etapa:
+        leitora.start()
+        while (item := fila_leitura.get()) is not FIM_FILA:
+            if isinstance(item, Exception):
+                print(f"Erro ao carregar o arquivo: {item}")
+                messagebox.showerror("Erro", f"Erro ao carregar o arquivo: {item}")
+                return None
+
+            chunk, relatorio_chunk = gerar_relatorio_validacao(item, colunas)
+            relatorio_validacao = relatorio_chunk if relatorio_validacao is None else mesclar_relatorios_validacao(relatorio_validacao, relatorio_chunk)
+            if not avaliar_relatorio_validacao(relatorio_validacao, interromper_em_erro=True)[0]:
+                # Nulos e colunas ausentes só aumentam: não adianta ler o resto do arquivo
+                parar.set()
+                while fila_leitura.get() is not FIM_FILA:
+                    pass
+                break
+
+            if esquema is None:
+                chunk = filtrar_colunas(chunk, colunas)
+                if chunk is None:
+                    parar.set()
+                    while fila_leitura.get() is not FIM_FILA:
+                        pass
+                    return None
+                memoria_antes += chunk.memory_usage(deep=True).sum()
+                chunk, relatorio_tipos = otimizar_tipos(chunk, colunas, notificar=False)
+                esquema = chunk.dtypes.to_dict()
+            else:
+                # As colunas já foram conferidas no primeiro chunk e a validação garante que estão em todos
+                chunk = chunk[list(esquema)]
+                memoria_antes += chunk.memory_usage(deep=True).sum()
+                chunk = aplicar_esquema_tipos(chunk, esquema)
+            memoria_depois += chunk.memory_usage(deep=True).sum()
+            chunks.append(chunk)
+        leitora.join()
+        etapa["linhas"] = sum(len(chunk) for chunk in chunks)
+
+    if esquema is not None:
+        relatorio_tipos.update({
+            "memoria_antes_mb": round(float(memoria_antes) / (1024 * 1024), 2),
+            "memoria_depois_mb": round(float(memoria_depois) / (1024 * 1024), 2),
+            "reducao_percentual": round(float(1 - memoria_depois / memoria_antes) * 100, 2) if memoria_antes else 0.0,
+            "tipos": {coluna: str(tipo) for coluna, tipo in esquema.items()}
+        })
+        print(f"Tipos otimizados: {relatorio_tipos['memoria_antes_mb']} MB -> {relatorio_tipos['memoria_depois_mb']} MB "
+              f"({relatorio_tipos['reducao_percentual']}% a menos).")
+        logging.info(f"Otimização de tipos: {relatorio_tipos}")
+
+    if relatorio_validacao is None:
+        print("Erro: o arquivo não contém linhas de dados.")
+        return None
+    valido, problemas = avaliar_relatorio_validacao(relatorio_validacao, interromper_em_erro=True)
+    print(formatar_relatorio_validacao(relatorio_validacao, problemas))
+    if not valido:
+        return None
+
+    with medir_etapa("limites_outliers", linhas=etapa["linhas"]):
+        limites = {
+            col: calcular_limites_outliers(pd.Series(np.concatenate([chunk[col].to_numpy(dtype=float) for chunk in chunks])), metodo)
+            for col in colunas
+        }
+
+    marcados = []
+    erros_escrita = []
+    fila_escrita = queue.Queue(maxsize=tamanho_fila)
+    escritora = None
+    somente_outliers = relatorios.get("somente_outliers")
+    linhas_outliers = []
+    linhas_arquivo = linhas_conferidas(caminho_csv, etapa["linhas"]) if somente_outliers else None
+    if relatorios.get("csv"):
+        caminho_relatorio = os.path.join(caminho_saida, "relatorio_outliers.csv" if somente_outliers else "relatorio.csv")
+        escritora = threading.Thread(target=_escrever_chunks_csv, args=(caminho_relatorio, fila_escrita, erros_escrita), daemon=True)
+        escritora.start()
+
+    def entregar(marcado: pd.DataFrame):
+        # Chamado na ordem dos chunks: o chunk começa na posição igual ao total já entregue
+        inicio = sum(len(m) for m in marcados)
+        marcados.append(marcado)
+        if escritora:
+            if somente_outliers:
+                linhas_chunk = None if linhas_arquivo is None else linhas_arquivo[inicio:inicio + len(marcado)]
+                marcado = extrair_outliers(marcado, colunas, linhas_chunk)
+                if linhas_chunk is not None:
+                    linhas_outliers.append(marcado["linha_arquivo"].to_numpy())
+            fila_escrita.put(marcado)
+
+    with medir_etapa("outliers_e_csv", linhas=etapa["linhas"], modo="sobreposto"):
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            # Mantém no máximo n_workers + tamanho_fila chunks em processamento ao mesmo tempo
+            pendentes = deque()
+            for chunk in chunks:
+                pendentes.append(executor.submit(detectar_outliers, chunk, metodo, colunas, limites))
+                if len(pendentes) >= n_workers + tamanho_fila:
+                    entregar(pendentes.popleft().result()[0])
+            while pendentes:
+                entregar(pendentes.popleft().result()[0])
+        chunks.clear()
+        if escritora:
+            fila_escrita.put(FIM_FILA)
+            escritora.join()
+
+    falhas = []
+    if escritora:
+        if erros_escrita:
+            print(f"Erro ao exportar CSV: {erros_escrita[0]}")
+            logging.error(f"Erro ao exportar CSV: {erros_escrita[0]}")
+            falhas.append("exportar_csv")
+        else:
+            print(f"CSV salvo em: {caminho_relatorio}")
+            logging.info(f"Relatório CSV exportado para: {caminho_relatorio}")
+            if somente_outliers and linhas_arquivo is not None:
+                linhas = np.concatenate(linhas_outliers) if linhas_outliers else np.array([], dtype=np.int64)
+                gravar_indice_outliers(caminho_csv, linhas, os.path.join(caminho_saida, "relatorio_outliers_indice.npy"))
+
+    df = pd.concat(marcados) if marcados else pd.DataFrame(columns=colunas)
+    with medir_etapa("estatisticas", linhas=len(df)):
+        stats = calcular_estatisticas(df)
+
+    if chave_cache:
+        salvar_resultado_cache(chave_cache, df, colunas, stats, limites)
+
+    # O índice de outliers já foi gravado junto com o CSV
+    falhas += exportar_relatorios(df, caminho_saida, {**relatorios, "csv": False}, opcoes_graficos, None if escritora else caminho_csv, linhas_arquivo)
+    if falhas:
+        messagebox.showerror("Erro", f"Falha ao gerar: {', '.join(falhas)}. Veja o log para detalhes.")
+
+    return stats
+
+def ler_amostra_csv(caminho: str, n_blocos: int = PREVIA_BLOCOS, bytes_por_bloco: int = PREVIA_BYTES_POR_BLOCO) -> Tuple[pd.DataFrame, np.ndarray, bool, int]:
+    """
+    Lê uma amostra de um CSV em tempo limitado, independente do tamanho do arquivo:
+    n_blocos trechos de bytes_por_bloco bytes, espaçados uniformemente pelo arquivo.
+    Linhas cortadas no início e no fim de cada trecho são descartadas.
+    Arquivos menores que o orçamento total são lidos inteiros.
+
+    Retorno:
+        tuple:
+            - pd.DataFrame: Linhas amostradas.
+            - np.ndarray: Número do bloco de origem de cada linha (usado no erro padrão).
+            - bool: True se o arquivo foi lido inteiro.
+            - int: Bytes lidos.
+    """
+    tamanho = os.path.getsize(caminho)
+    codificacao = _detectar_codificacao(caminho, tamanho_amostra=bytes_por_bloco)
+
+    with open(caminho, "rb") as f:
+        primeira_linha = f.readline()
+        inicio_dados = f.tell()
+
+        if tamanho <= n_blocos * bytes_por_bloco:
+            df = pd.read_csv(caminho, sep=',', on_bad_lines='skip', encoding=codificacao, encoding_errors='replace')
+            return df, np.arange(len(df)) % n_blocos, True, tamanho
+
+        cabecalho = pd.read_csv(io.BytesIO(primeira_linha), encoding=codificacao, encoding_errors='replace').columns.tolist()
+        passo = (tamanho - inicio_dados - bytes_por_bloco) / max(n_blocos - 1, 1)
+        partes = []
+        blocos = []
+        bytes_lidos = len(primeira_linha)
+        for k in range(n_blocos):
+            inicio = inicio_dados + int(k * passo)
+            f.seek(inicio)
+            dados = f.read(bytes_por_bloco)
+            bytes_lidos += len(dados)
+            if inicio > inicio_dados:
+                # Descarta a linha parcial do início do trecho
+                dados = dados[dados.find(b"\n") + 1:]
+            dados = dados[:dados.rfind(b"\n") + 1]
+            if not dados:
+                continue
+            parte = pd.read_csv(io.BytesIO(dados), header=None, names=cabecalho, sep=',', on_bad_lines='skip',
+                                encoding=codificacao, encoding_errors='replace')
+            partes.append(parte)
+            blocos.append(np.full(len(parte), k))
+
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=cabecalho)
+    return df, np.concatenate(blocos) if blocos else np.array([], dtype=int), False, bytes_lidos
+
+def _estimativa_com_erro(valores_por_bloco: pd.Series, valor_amostra: float, completa: bool) -> Tuple[float, float]:
+    """
+    Retorna (estimativa, margem de erro de 95%). A margem usa a variação entre blocos,
+    que respeita a correlação entre linhas vizinhas de um mesmo trecho do arquivo.
+    """
+    valores = valores_por_bloco.dropna()
+    if completa or len(valores) < 2:
+        return float(valor_amostra), 0.0
+    return float(valor_amostra), float(1.96 * valores.std(ddof=1) / np.sqrt(len(valores)))
+
+def gerar_previa(caminho: str, colunas: List[str], metodo: str = "IQR") -> Tuple[dict, pd.DataFrame]:
+    """
+    Prévia rápida de um arquivo grande: lê uma amostra (ver ler_amostra_csv) e aplica a mesma
+    validação, detecção de outliers e estatísticas do pipeline completo, com margens de erro de 95%.
+
+    Parâmetros:
+        caminho (str): Arquivo CSV ou XLSX (para XLSX são lidas as primeiras PREVIA_LINHAS_XLSX linhas).
+        colunas (List[str]): Colunas numéricas a analisar.
+        metodo (str): "IQR" ou "Z-Score".
+
+    Retorno:
+        tuple:
+            - dict: Resumo com tipos, validação, linhas estimadas e, por coluna, média, taxa de outliers
+                    e limites, cada estimativa com sua margem de erro ("erro_...").
+            - pd.DataFrame: A amostra analisada, com as colunas de outlier.
+    """
+    inicio = time.perf_counter()
+    if Path(caminho).suffix.lower() == ".xlsx":
+        amostra = pd.read_excel(caminho, nrows=PREVIA_LINHAS_XLSX)
+        blocos = np.arange(len(amostra)) % PREVIA_BLOCOS
+        completa = len(amostra) < PREVIA_LINHAS_XLSX
+        bytes_lidos = os.path.getsize(caminho) if completa else 0
+    else:
+        amostra, blocos, completa, bytes_lidos = ler_amostra_csv(caminho)
+
+    tipos = {col: str(tipo) for col, tipo in amostra.dtypes.items()}
+    amostra, relatorio = gerar_relatorio_validacao(amostra, colunas)
+    _, problemas = avaliar_relatorio_validacao(relatorio)
+    relatorio["problemas"] = problemas
+
+    colunas = [col for col in colunas if col in amostra.columns]
+    amostra, _ = detectar_outliers(amostra, metodo, colunas)
+    por_bloco = amostra.groupby(blocos)
+
+    tamanho = os.path.getsize(caminho)
+    previa = {
+        "arquivo": caminho,
+        "completa": completa,
+        "linhas_amostra": len(amostra),
+        "bytes_lidos": bytes_lidos,
+        "linhas_estimadas": len(amostra) if completa or not bytes_lidos else int(len(amostra) * tamanho / bytes_lidos),
+        "tipos": tipos,
+        "validacao": relatorio,
+        "colunas": {}
+    }
+    for col in colunas:
+        media, erro_media = _estimativa_com_erro(por_bloco[col].mean(), amostra[col].mean(), completa)
+        taxa, erro_taxa = _estimativa_com_erro(por_bloco[f"{col}_outlier"].mean() * 100, amostra[f"{col}_outlier"].mean() * 100, completa)
+        previa["colunas"][col] = {
+            "media": media,
+            "erro_media": erro_media,
+            "taxa_outliers": taxa,
+            "erro_taxa_outliers": erro_taxa,
+            "limites": [float(lim) for lim in calcular_limites_outliers(amostra[col], metodo)]
+        }
+    previa["tempo_s"] = round(time.perf_counter() - inicio, 3)
+    return previa, amostra
+
+def formatar_previa(previa: dict) -> str:
+    """
+    Monta um texto legível com as estimativas da prévia e suas margens de erro.
+    """
+    tipo_leitura = "arquivo inteiro" if previa["completa"] else f"amostra de {previa['linhas_amostra']} linhas"
+    linhas = [
+        f"Prévia ({tipo_leitura}, {previa['tempo_s']:.1f}s)",
+        f"Linhas estimadas no arquivo: ~{previa['linhas_estimadas']}",
+        "Tipos: " + ", ".join(f"{col}: {tipo}" for col, tipo in previa["tipos"].items())
+    ]
+    for col, info in previa["colunas"].items():
+        linhas.append(f"{col}: média {info['media']:.4g} ± {info['erro_media']:.2g}, "
+                      f"outliers {info['taxa_outliers']:.2f}% ± {info['erro_taxa_outliers']:.2f}")
+    linhas.extend(previa["validacao"]["problemas"])
+    return "\n".join(linhas)
+
+def gerar_grafico_previa(previa: dict, amostra: pd.DataFrame, pasta_saida: str, nome_png: str = "previa_thundercsv.png") -> str:
+    """
+    Salva um PNG com o histograma de cada coluna na amostra (com os limites de outlier)
+    e a taxa de outliers estimada com barras de erro.
+    """
+    colunas = list(previa["colunas"])
+    fig, eixos = plt.subplots(len(colunas) + 1, 1, figsize=(7, 2.5 * (len(colunas) + 1)), squeeze=False)
+    for eixo, col in zip(eixos[:, 0], colunas):
+        eixo.hist(amostra[col].dropna(), bins=30, color="skyblue", edgecolor="black")
+        for limite in previa["colunas"][col]["limites"]:
+            eixo.axvline(limite, color="red", linestyle="--")
+        eixo.set_title(f"Histograma (amostra) - {col}")
+
+    taxas = [previa["colunas"][col]["taxa_outliers"] for col in colunas]
+    erros = [previa["colunas"][col]["erro_taxa_outliers"] for col in colunas]
+    eixo = eixos[-1, 0]
+    eixo.bar(colunas, taxas, yerr=erros, capsize=4, color="lightgreen", edgecolor="black")
+    eixo.set_ylabel("% outliers")
+    eixo.set_title("Taxa de outliers estimada (IC 95%)")
+
+    fig.tight_layout()
+    caminho_png = os.path.join(pasta_saida, nome_png)
+    fig.savefig(caminho_png)
+    plt.close(fig)
+    return caminho_png
+
+def relatorio_gerado(caminho: str) -> bool:
+    """
+    Indica se o arquivo é um relatório gravado pela própria ferramenta (ARQUIVOS_RELATORIO ou <nome>_outliers.csv/.xlsx).
+    """
+    p = Path(caminho)
+    return p.name.lower() in ARQUIVOS_RELATORIO or (p.suffix.lower() in (".csv", ".xlsx") and p.stem.endswith("_outliers"))
+
+def listar_shards(origem: str) -> List[str]:
+    """
+    Lista os arquivos de um lote: todos os .csv/.xlsx de uma pasta, ou os arquivos que casam com um glob.
+    Relatórios gerados pela ferramenta (ver relatorio_gerado) ficam de fora, para que uma pasta de saída
+    igual à de entrada não faça um lote contar de novo os resultados do anterior.
+    """
+    if os.path.isdir(origem):
+        caminhos = [str(p) for p in Path(origem).iterdir() if p.suffix.lower() in (".csv", ".xlsx")]
+    else:
+        caminhos = glob.glob(origem)
+    return sorted(c for c in caminhos if os.path.isfile(c) and not relatorio_gerado(c))
+
+def _ler_shard(caminho: str) -> pd.DataFrame:
+    # Sem caixas de diálogo: esta função roda em processos filhos. Os arquivos do lote estão completos,
+    # então são lidos inteiros (ler_trecho_csv descartaria uma última linha sem quebra de linha)
+    if Path(caminho).suffix.lower() == ".xlsx":
+        return pd.read_excel(caminho)
+    try:
+        return pd.read_csv(caminho, encoding='utf-8', sep=',', on_bad_lines='skip')
+    except UnicodeDecodeError:
+        return pd.read_csv(caminho, encoding='latin1', sep=',', on_bad_lines='skip')
+
+def resumir_shard(caminho: str, colunas: List[str], tamanho_amostra: int = TAMANHO_AMOSTRA_LOTE) -> dict:
+    """
+    Primeira passada do lote (roda em um processo filho): valida o arquivo e resume cada coluna
+    em um estado mesclável, sem devolver os dados.
+
+    Retorno:
+        dict: {"caminho", "linhas", "validacao", "valido", "estados", "erro"}.
+    """
+    try:
+        df = _ler_shard(caminho)
+    except Exception as e:
+        return {"caminho": caminho, "linhas": 0, "valido": False, "erro": str(e)}
+
+    df, relatorio = gerar_relatorio_validacao(df, colunas)
+    valido, problemas = avaliar_relatorio_validacao(relatorio, interromper_em_erro=True)
+    relatorio["problemas"] = problemas
+    resumo = {"caminho": caminho, "linhas": len(df), "validacao": relatorio, "valido": valido, "erro": None}
+    if valido:
+        rng = np.random.default_rng()
+        resumo["estados"] = {col: estado_coluna(df[col], tamanho_amostra, rng) for col in colunas}
+    return resumo
+
+def marcar_shard(caminho: str, colunas: List[str], metodo: str, limites: dict, pasta_saida: str, relatorios: dict = None, opcoes_graficos: dict = None) -> dict:
+    """
+    Segunda passada do lote (roda em um processo filho): marca os outliers do arquivo com os limites
+    globais e grava os relatórios pedidos na pasta de saída: <nome>_outliers.csv, <nome>_outliers.xlsx
+    e <nome>_graficos.pdf. Com relatorios["somente_outliers"], CSV e Excel recebem só as linhas marcadas.
+
+    Retorno:
+        dict: {"caminho", "saidas", "falhas", "outliers": {coluna: {"quantidade_outliers", "percentual_outliers"}}}.
+    """
+    relatorios = {"csv": True} if relatorios is None else relatorios
+    df = _ler_shard(caminho)
+    df = df[colunas].apply(pd.to_numeric, errors='coerce')
+    df, estatisticas_outliers = detectar_outliers(df, metodo, colunas, limites=limites)
+
+    base = os.path.join(pasta_saida, Path(caminho).stem)
+    df_tabela = extrair_outliers(df, colunas) if relatorios.get("somente_outliers") else df
+    saidas, falhas = [], []
+    for nome, funcao, extensao in (("csv", exportar_csv, ".csv"), ("excel", exportar_excel, ".xlsx")):
+        if relatorios.get(nome):
+            destino = f"{base}_outliers{extensao}"
+            (saidas if funcao(df_tabela, destino, notificar=False) else falhas).append(destino)
+    if relatorios.get("pdf"):
+        destino = f"{base}_graficos.pdf"
+        try:
+            gerar_graficos_pdf(df, opcoes_graficos or {}, pasta_saida, nome_pdf=os.path.basename(destino))
+            saidas.append(destino)
+        except Exception as e:
+            logging.error(f"Erro ao gerar PDF de '{caminho}': {e}")
+            falhas.append(destino)
+    return {"caminho": caminho, "saidas": saidas, "falhas": falhas, "outliers": estatisticas_outliers}
+
+def processar_lote(origem: str, caminho_saida: str, colunas: List[str], metodo: str, n_processos: int = None, relatorios: dict = None, opcoes_graficos: dict = None) -> dict | None:
+    """
+    Processa vários arquivos com o mesmo esquema em paralelo (um arquivo por processo).
+    Os limites de outlier são globais: cada arquivo é resumido em estados mescláveis
+    (ver estado_coluna), os estados são combinados e só então os arquivos são marcados.
+    Para Z-Score os limites são exatos; para IQR os quartis vêm de uma amostra de TAMANHO_AMOSTRA_LOTE
+    valores por arquivo.
+
+    Gera:
+        - para cada arquivo válido, os relatórios pedidos (ver marcar_shard);
+        - relatorio_lote.csv com uma linha por arquivo e o total consolidado;
+        - relatorio_lote.json com estatísticas globais, limites e problemas de validação.
+
+    Parâmetros:
+        origem (str): Pasta ou padrão glob (ex: "dados/2024-*.csv").
+        caminho_saida (str): Pasta de saída.
+        colunas (List[str]): Colunas numéricas analisadas.
+        metodo (str): "IQR" ou "Z-Score".
+        n_processos (int, opcional): Número de processos (padrão: número de CPUs).
+        relatorios (dict, opcional): Relatórios por arquivo, como em executar_pipeline (padrão: só CSV).
+        opcoes_graficos (dict, opcional): Opções de gráfico repassadas a gerar_graficos_pdf.
+
+    Retorno:
+        dict | None: Estatísticas globais no formato de calcular_estatisticas, ou None se nenhum arquivo for válido.
+    """
+    shards = listar_shards(origem)
+    if not shards:
+        print(f"Nenhum arquivo CSV/XLSX encontrado em '{origem}'.")
+        return None
+    n_processos = n_processos or os.cpu_count() or 1
+    print(f"Processando lote de {len(shards)} arquivos com {n_processos} processos...")
+
+    with ProcessPoolExecutor(max_workers=n_processos, initializer=_iniciar_worker_sem_interface) as executor:
+        with medir_etapa("lote_resumir", arquivos=len(shards)) as etapa:
+            resumos = list(executor.map(partial(resumir_shard, colunas=colunas), shards))
+            etapa["linhas"] = sum(r["linhas"] for r in resumos)
+
+        validos = [r for r in resumos if r["valido"]]
+        for resumo in resumos:
+            if not resumo["valido"]:
+                motivo = resumo["erro"] or "; ".join(resumo["validacao"]["problemas"])
+                print(f"Aviso: '{resumo['caminho']}' ignorado: {motivo}")
+                logging.warning(f"Lote: '{resumo['caminho']}' ignorado: {motivo}")
+        if not validos:
+            print("Erro: nenhum arquivo do lote passou na validação.")
+            return None
+
+        estados = {}
+        for col in colunas:
+            estado = validos[0]["estados"][col]
+            for resumo in validos[1:]:
+                estado = mesclar_estados_coluna(estado, resumo["estados"][col], TAMANHO_AMOSTRA_LOTE)
+            estados[col] = estado
+        limites = {col: limites_do_estado(estados[col], metodo) for col in colunas}
+
+        with medir_etapa("lote_marcar", arquivos=len(validos), linhas=sum(r["linhas"] for r in validos)):
+            marcacoes = list(executor.map(
+                partial(marcar_shard, colunas=colunas, metodo=metodo, limites=limites, pasta_saida=caminho_saida,
+                        relatorios=relatorios, opcoes_graficos=opcoes_graficos),
+                [r["caminho"] for r in validos]
+            ))
+        for marcacao in marcacoes:
+            for destino in marcacao["falhas"]:
+                print(f"Aviso: falha ao gerar '{destino}'. Veja o log para detalhes.")
+                logging.warning(f"Lote: falha ao gerar '{destino}'.")
+
+    stats = estatisticas_do_estado(estados)
+    linhas_por_arquivo = {r["caminho"]: r["linhas"] for r in validos}
+    consolidado = []
+    for marcacao in marcacoes:
+        linha = {"arquivo": os.path.basename(marcacao["caminho"]), "linhas": linhas_por_arquivo[marcacao["caminho"]]}
+        for col, info in marcacao["outliers"].items():
+            linha[f"{col}_outliers"] = info["quantidade_outliers"]
+        consolidado.append(linha)
+    total = {"arquivo": "TOTAL", "linhas": sum(l["linhas"] for l in consolidado)}
+    for col in colunas:
+        total[f"{col}_outliers"] = sum(l.get(f"{col}_outliers", 0) for l in consolidado)
+    consolidado.append(total)
+
+    exportar_csv(pd.DataFrame(consolidado), os.path.join(caminho_saida, "relatorio_lote.csv"), notificar=False)
+    with open(os.path.join(caminho_saida, "relatorio_lote.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "metodo": metodo,
+            "arquivos": len(shards),
+            "arquivos_ignorados": [r["caminho"] for r in resumos if not r["valido"]],
+            "limites": {col: list(lim) for col, lim in limites.items()},
+            "estatisticas": stats,
+            "validacao": {r["caminho"]: r.get("validacao", {}).get("problemas", [r["erro"]]) for r in resumos}
+        }, f, ensure_ascii=False, indent=2, default=float)
+
+    print(f"Lote concluído: {len(validos)} de {len(shards)} arquivos, {total['linhas']} linhas.")
+    logging.info(f"Lote {origem}: {len(validos)}/{len(shards)} arquivos processados.")
+    return stats
+
+def memoria_disponivel_bytes() -> int | None:
+    """
+    Memória física disponível, em bytes, ou None se não for possível descobrir.
+    """
+    if PSUTIL_DISPONIVEL:
+        import psutil
+        return psutil.virtual_memory().available
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def _identificador_sql(nome: str) -> str:
+    return '"' + nome.replace('"', '""') + '"'
+
+def analisar_com_pandas(caminho_csv: str, colunas: List[str], metodo: str, caminho_relatorio: str = None, somente_outliers: bool = False, chave_cache: str = None) -> dict:
+    """
+    Backend de referência: carrega as colunas na memória com pandas.
+    Todos os backends recebem os mesmos argumentos e devolvem o mesmo formato.
+
+    Parâmetros:
+        caminho_csv (str): Arquivo CSV de entrada.
+        colunas (List[str]): Colunas numéricas analisadas (valores inválidos viram nulos).
+        metodo (str): "IQR" ou "Z-Score".
+        caminho_relatorio (str, opcional): Onde gravar as colunas analisadas com as marcações de outlier.
+        somente_outliers (bool): Grava só as linhas marcadas, com a coluna "colunas_outlier" (ver extrair_outliers).
+        chave_cache (str, opcional): Grava as marcações no cache de resultados (ver salvar_resultado_cache).
+                                     Só este backend aceita, pois é o único com as marcações em memória.
+
+    Retorno:
+        dict: {"linhas", "limites": {coluna: (inf, sup)}, "estatisticas" (formato de calcular_estatisticas),
+               "outliers" (formato de detectar_outliers)}.
+    """
+    df = pd.read_csv(caminho_csv, usecols=colunas, sep=',', on_bad_lines='skip')[colunas]
+    df = df.apply(pd.to_numeric, errors='coerce')
+    limites = {col: calcular_limites_outliers(df[col], metodo) for col in colunas}
+    df, outliers = detectar_outliers(df, metodo, colunas, limites=limites)
+    if caminho_relatorio:
+        (extrair_outliers(df, colunas) if somente_outliers else df).to_csv(caminho_relatorio, index=False)
+    estatisticas = calcular_estatisticas(df)
+    if chave_cache:
+        salvar_resultado_cache(chave_cache, df, colunas, estatisticas, limites)
+    return {"linhas": len(df), "limites": limites, "estatisticas": estatisticas, "outliers": outliers}
+
+def analisar_com_duckdb(caminho_csv: str, colunas: List[str], metodo: str, caminho_relatorio: str = None, somente_outliers: bool = False) -> dict:
+    """
+    Backend fora da memória com DuckDB: as agregações e a gravação do relatório são executadas
+    pelo motor de consultas em streaming, sem carregar o arquivo inteiro.
+    Mesma interface de analisar_com_pandas.
+    """
+    import duckdb
+
+    con = duckdb.connect()
+    caminho_sql = caminho_csv.replace("'", "''")
+    # Texto -> número como pd.to_numeric(errors='coerce'): inválidos e NaN viram nulos
+    conversoes = ", ".join(
+        f"NULLIF(TRY_CAST({_identificador_sql(c)} AS DOUBLE), 'NaN'::DOUBLE) AS {_identificador_sql(c)}" for c in colunas
+    )
+    # Delimitador fixo e linhas com campos a mais descartadas, como o on_bad_lines='skip' do pandas
+    con.execute(f"CREATE VIEW dados AS SELECT {conversoes} FROM read_csv('{caminho_sql}', header=true, all_varchar=true, delim=',', ignore_errors=true)")
+
+    agregacoes = ["count(*)"]
+    for c in colunas:
+        col = _identificador_sql(c)
+        agregacoes += [f"count({col})", f"avg({col})", f"sum({col})", f"min({col})", f"max({col})",
+                       f"quantile_cont({col}, 0.25)", f"quantile_cont({col}, 0.75)", f"stddev_samp({col})"]
+    resultado = con.execute(f"SELECT {', '.join(agregacoes)} FROM dados").fetchone()
+
+    linhas = resultado[0]
+    estatisticas, limites = {}, {}
+    for i, c in enumerate(colunas):
+        n, media, soma, minimo, maximo, q1, q3, desvio = resultado[1 + 8 * i: 9 + 8 * i]
+        estatisticas[c] = {'media': media, 'soma': soma if n else 0.0, 'minimo': minimo, 'maximo': maximo, 'contagem': n}
+        if metodo == "IQR":
+            fator = PARAMETROS_METODOS["IQR"]["fator_iqr"]
+            limites[c] = (q1 - fator * (q3 - q1), q3 + fator * (q3 - q1)) if n else (float("nan"), float("nan"))
+        elif metodo == "Z-Score":
+            limite_z = PARAMETROS_METODOS["Z-Score"]["limite_z"]
+            limites[c] = (media - limite_z * desvio, media + limite_z * desvio) if desvio is not None else (float("nan"), float("nan"))
+        else:
+            raise ValueError("Método inválido. Use 'IQR' ou 'Z-Score'.")
+
+    condicoes = {
+        c: f"COALESCE({_identificador_sql(c)} < {limites[c][0]!r} OR {_identificador_sql(c)} > {limites[c][1]!r}, false)"
+        if not np.isnan(limites[c][0]) else "false"
+        for c in colunas
+    }
+    contagens = con.execute(
+        f"SELECT {', '.join(f'count_if({cond})' for cond in condicoes.values())} FROM dados"
+    ).fetchone()
+    outliers = {
+        c: {"quantidade_outliers": int(q), "percentual_outliers": round(q / linhas * 100, 2) if linhas else 0.0}
+        for c, q in zip(colunas, contagens)
+    }
+
+    if caminho_relatorio:
+        marcacoes = ", ".join(
+            f"CASE WHEN {cond} THEN 'True' ELSE 'False' END AS {_identificador_sql(c + '_outlier')}"
+            for c, cond in condicoes.items()
+        )
+        destino = caminho_relatorio.replace("'", "''")
+        consulta = f"SELECT *, {marcacoes} FROM dados"
+        if somente_outliers:
+            # Mesmo formato de extrair_outliers: colunas que dispararam a marcação, separadas por ";"
+            gatilhos = ", ".join(f"CASE WHEN {cond} THEN '{nome}' END" for nome, cond in
+                                 ((c.replace("'", "''"), cond) for c, cond in condicoes.items()))
+            consulta = (f"SELECT colunas_outlier, * EXCLUDE (colunas_outlier) FROM ("
+                        f"SELECT *, {marcacoes}, concat_ws(';', {gatilhos}) AS colunas_outlier FROM dados "
+                        f"WHERE {' OR '.join(f'({cond})' for cond in condicoes.values())})")
+        con.execute(f"COPY ({consulta}) TO '{destino}' (HEADER, DELIMITER ',')")
+    con.close()
+    return {"linhas": linhas, "limites": limites, "estatisticas": estatisticas, "outliers": outliers}
+
+def analisar_com_polars(caminho_csv: str, colunas: List[str], metodo: str, caminho_relatorio: str = None, somente_outliers: bool = False) -> dict:
+    """
+    Backend fora da memória com Polars (plano lazy + gravação em streaming com sink_csv).
+    Mesma interface de analisar_com_pandas.
+    """
+    import polars as pl
+
+    # Texto -> número como pd.to_numeric(errors='coerce'): inválidos e NaN viram nulos
+    dados = pl.scan_csv(caminho_csv, infer_schema_length=0).select(
+        [pl.col(c).str.strip_chars().cast(pl.Float64, strict=False).fill_nan(None) for c in colunas]
+    )
+    agregacoes = [pl.len().alias("linhas")]
+    for i, c in enumerate(colunas):
+        col = pl.col(c)
+        agregacoes += [col.count().alias(f"n{i}"), col.mean().alias(f"media{i}"), col.sum().alias(f"soma{i}"),
+                       col.min().alias(f"min{i}"), col.max().alias(f"max{i}"),
+                       col.quantile(0.25, "linear").alias(f"q1{i}"), col.quantile(0.75, "linear").alias(f"q3{i}"),
+                       col.std(ddof=1).alias(f"desvio{i}")]
+    resultado = dados.select(agregacoes).collect().row(0, named=True)
+
+    linhas = resultado["linhas"]
+    estatisticas, limites, marcacoes = {}, {}, []
+    for i, c in enumerate(colunas):
+        n, media, desvio = resultado[f"n{i}"], resultado[f"media{i}"], resultado[f"desvio{i}"]
+        q1, q3 = resultado[f"q1{i}"], resultado[f"q3{i}"]
+        estatisticas[c] = {'media': media, 'soma': resultado[f"soma{i}"], 'minimo': resultado[f"min{i}"],
+                           'maximo': resultado[f"max{i}"], 'contagem': n}
+        if metodo == "IQR":
+            fator = PARAMETROS_METODOS["IQR"]["fator_iqr"]
+            limites[c] = (q1 - fator * (q3 - q1), q3 + fator * (q3 - q1)) if n else (float("nan"), float("nan"))
+        elif metodo == "Z-Score":
+            limite_z = PARAMETROS_METODOS["Z-Score"]["limite_z"]
+            limites[c] = (media - limite_z * desvio, media + limite_z * desvio) if desvio is not None else (float("nan"), float("nan"))
+        else:
+            raise ValueError("Método inválido. Use 'IQR' ou 'Z-Score'.")
+        marcacoes.append(((pl.col(c) < limites[c][0]) | (pl.col(c) > limites[c][1])).fill_null(False).alias(f"{c}_outlier"))
+
+    marcado = dados.with_columns(marcacoes)
+    contagens = marcado.select([pl.col(f"{c}_outlier").sum() for c in colunas]).collect().row(0)
+    outliers = {
+        c: {"quantidade_outliers": int(q), "percentual_outliers": round(q / linhas * 100, 2) if linhas else 0.0}
+        for c, q in zip(colunas, contagens)
+    }
+    if caminho_relatorio:
+        if somente_outliers:
+            # Mesmo formato de extrair_outliers: colunas que dispararam a marcação, separadas por ";"
+            gatilhos = pl.concat_str([pl.when(pl.col(f"{c}_outlier")).then(pl.lit(c)) for c in colunas], separator=";", ignore_nulls=True)
+            marcado = marcado.filter(pl.any_horizontal([pl.col(f"{c}_outlier") for c in colunas])).select(
+                [gatilhos.alias("colunas_outlier"), pl.all()]
+            )
+        marcado.with_columns([
+            pl.when(pl.col(f"{c}_outlier")).then(pl.lit("True")).otherwise(pl.lit("False")).alias(f"{c}_outlier") for c in colunas
+        ]).sink_csv(caminho_relatorio)
+    return {"linhas": linhas, "limites": limites, "estatisticas": estatisticas, "outliers": outliers}
+
+BACKENDS = {
+    "pandas": analisar_com_pandas,
+    "duckdb": analisar_com_duckdb,
+    "polars": analisar_com_polars
+}
+
+def backends_disponiveis() -> List[str]:
+    """
+    Backends cujas bibliotecas estão instaladas, na ordem de preferência para execução fora da memória.
+    """
+    return ["pandas"] + [nome for nome in ("duckdb", "polars") if importlib.util.find_spec(nome) is not None]
+
+def escolher_backend(caminho_csv: str, preferido: str = "auto") -> str:
+    """
+    Escolhe o backend de execução. Em "auto", usa pandas enquanto o arquivo (vezes FATOR_MEMORIA_PANDAS)
+    couber na memória disponível; acima disso, o primeiro backend fora da memória instalado.
+    """
+    disponiveis = backends_disponiveis()
+    if preferido != "auto":
+        if preferido not in disponiveis:
+            raise ValueError(f"Backend '{preferido}' indisponível. Instalados: {', '.join(disponiveis)}")
+        return preferido
+
+    memoria = memoria_disponivel_bytes()
+    necessaria = os.path.getsize(caminho_csv) * FATOR_MEMORIA_PANDAS
+    if memoria is None or necessaria < memoria or len(disponiveis) == 1:
+        return "pandas"
+    return disponiveis[1]
+
+def executar_fora_da_memoria(backend: str, caminho_csv: str, caminho_saida: str, colunas: List[str], metodo: str, relatorios: dict) -> dict | None:
+    """
+    Executa a análise com um backend fora da memória. Só o relatório CSV é gerado:
+    Excel e PDF precisam da tabela inteira em memória. Com relatorios["somente_outliers"], o CSV
+    (relatorio_outliers.csv) recebe só as linhas marcadas e a coluna colunas_outlier, mas sem
+    linha_arquivo nem índice: os motores não informam a linha física de cada registro.
+
+    Antes do backend, as colunas são conferidas com o cabeçalho e o arquivo passa pela mesma validação
+    do caminho pandas (validar_csv_em_fluxo, em chunks): o backend escolhido não muda o veredito.
+
+    Retorno:
+        dict | None: Estatísticas calculadas, ou None se a validação ou o backend falharem.
+    """
+    colunas_arquivo = pd.read_csv(caminho_csv, sep=',', nrows=0, encoding=_detectar_codificacao(caminho_csv)).columns.tolist()
+    colunas_nao_encontradas = [col for col in colunas if col not in colunas_arquivo]
+    if colunas_nao_encontradas:
+        print(f"Erro: As seguintes colunas não foram encontradas no arquivo: {', '.join(colunas_nao_encontradas)}")
+        print(f"Colunas disponíveis no arquivo: {', '.join(colunas_arquivo)}")
+        return None
 
-    estatisticas_outliers = {}
+    with medir_etapa("validar", bytes=os.path.getsize(caminho_csv)) as etapa:
+        relatorio_validacao = validar_csv_em_fluxo(caminho_csv, colunas, LINHAS_POR_CHUNK_FLUXO, interromper_em_erro=True)
+        etapa["linhas"] = relatorio_validacao["linhas"]
+    print(formatar_relatorio_validacao(relatorio_validacao, relatorio_validacao["problemas"]))
+    logging.info(f"Validação: {json.dumps(relatorio_validacao, default=str)}")
+    if not relatorio_validacao["valido"]:
+        return None
 
-    for coluna in colunas:
-        if coluna not in df.columns:
-            continue 
+    print(f"Usando o backend fora da memória '{backend}'.")
+    somente_outliers = bool(relatorios.get("somente_outliers"))
+    caminho_relatorio = None
+    if relatorios.get("csv"):
+        caminho_relatorio = os.path.join(caminho_saida, "relatorio_outliers.csv" if somente_outliers else "relatorio.csv")
+        if somente_outliers:
+            print("Aviso: fora da memória, o relatório de outliers não traz o número da linha nem o índice.")
+    with medir_etapa(f"backend_{backend}", bytes=os.path.getsize(caminho_csv)) as etapa:
+        try:
+            resultado = BACKENDS[backend](caminho_csv, colunas, metodo, caminho_relatorio, somente_outliers)
+        except Exception as e:
+            print(f"Erro no backend '{backend}': {e}")
+            logging.error(f"Erro no backend '{backend}': {e}")
+            messagebox.showerror("Erro", f"Erro no backend '{backend}': {e}")
+            return None
+        etapa["linhas"] = resultado["linhas"]
+    if resultado["linhas"] != relatorio_validacao["linhas"]:
+        # Linhas irregulares que o backend tratou diferente do pandas: o resultado não seria o mesmo
+        mensagem = (f"O backend '{backend}' leu {resultado['linhas']} linhas, mas a validação leu "
+                    f"{relatorio_validacao['linhas']}. Use o backend pandas para este arquivo.")
+        print(f"Erro: {mensagem}")
+        logging.error(mensagem)
+        messagebox.showerror("Erro", mensagem)
+        if caminho_relatorio and os.path.isfile(caminho_relatorio):
+            os.remove(caminho_relatorio)
+        return None
+    if caminho_relatorio:
+        print(f"CSV salvo em: {caminho_relatorio}")
+        logging.info(f"Relatório CSV exportado para: {caminho_relatorio} (backend {backend})")
+    if relatorios.get("excel") or relatorios.get("pdf"):
+        print("Aviso: Excel e PDF não são gerados na execução fora da memória.")
+    return resultado["estatisticas"]
+
+def executar_pipeline(caminho_csv: str, caminho_saida: str, colunas: List[str], metodo: str, relatorios: dict, opcoes_graficos: dict, incremental: bool = False, usar_cache: bool = True, colunas_grupo: List[str] = None, backend: str = "auto") -> dict | None:
+    """
+    Executa o pipeline de análise sobre um arquivo, sem depender da interface.
+    Cada etapa é medida com medir_etapa.
 
-        if metodo == "IQR":
-            # Define como outlier qualquer valor muito abaixo do primeiro quartil (Q1) ou muito acima do terceiro quartil (Q3)
-            q1 = df[coluna].quantile(0.25)
-            q3 = df[coluna].quantile(0.75)
-            iqr = q3 - q1
-            lim_inf = q1 - 1.5 * iqr
-            lim_sup = q3 + 1.5 * iqr
-            outliers = (df[coluna] < lim_inf) | (df[coluna] > lim_sup)
+    Parâmetros:
+        caminho_csv (str): Arquivo CSV ou XLSX de entrada.
+        caminho_saida (str): Pasta onde os relatórios são gravados.
+        colunas (List[str]): Colunas a analisar.
+        metodo (str): "IQR" ou "Z-Score".
+        relatorios (dict): Relatórios a gerar (ex: {"csv": True, "excel": False, "pdf": True}).
+        opcoes_graficos (dict): Opções de gráfico repassadas a gerar_graficos_pdf.
+        incremental (bool): Usa processar_incremental quando a entrada é CSV.
+        usar_cache (bool): Reaproveita outliers e estatísticas já calculados para o mesmo conteúdo,
+                           colunas e método (ver chave_cache_resultados).
+        colunas_grupo (List[str], opcional): Calcula os limites por grupo (ver detectar_outliers_por_grupo)
+                                             e grava relatorio_grupos.csv. Desativa os modos incremental,
+                                             cache e pipeline sobreposto.
+        backend (str): "auto", "pandas", "duckdb" ou "polars" (ver escolher_backend). Os backends
+                       fora da memória só valem para CSV sem grupos nem modo incremental.
 
-        elif metodo == "Z-Score":
-            # Define como outlier qualquer valor muito distante da média
-            media = df[coluna].mean()
-            desvio = df[coluna].std()
-            z_score = (df[coluna] - media) / desvio
-            outliers = z_score.abs() > 3
+    Retorno:
+        dict | None: Estatísticas calculadas, ou None se o pipeline foi interrompido.
+    """
+    if colunas_grupo:
+        incremental = usar_cache = False
+
+    if not incremental and not colunas_grupo and Path(caminho_csv).suffix.lower() == ".csv" and os.path.isfile(caminho_csv):
+        backend = escolher_backend(caminho_csv, backend)
+        if backend != "pandas":
+            return executar_fora_da_memoria(backend, caminho_csv, caminho_saida, colunas, metodo, relatorios)
+
+    chave_cache = None
+    linhas_arquivo = None
+    if usar_cache and not incremental and os.path.isfile(caminho_csv):
+        with medir_etapa("cache", bytes=os.path.getsize(caminho_csv)) as etapa:
+            chave_cache = chave_cache_resultados(impressao_digital_arquivo(caminho_csv), colunas, metodo)
+            resultado = carregar_resultado_cache(chave_cache)
+            etapa["acerto"] = resultado is not None
+        if resultado is not None:
+            print("Resultado encontrado no cache: pulando validação, outliers e estatísticas.")
+            logging.info(f"Cache de resultados utilizado ({chave_cache}).")
+            stats = executar_com_cache(resultado, caminho_csv, caminho_saida, colunas, relatorios, opcoes_graficos)
+            if stats is not None:
+                return stats
+
+    if incremental and Path(caminho_csv).suffix.lower() == ".csv":
+        with medir_etapa("incremental", bytes=os.path.getsize(caminho_csv)) as etapa:
+            df, stats, foi_incremental, linhas_arquivo = processar_incremental(
+                caminho_csv, caminho_saida, colunas, metodo, numerar_linhas=bool(relatorios.get("somente_outliers"))
+            )
+            etapa["linhas"] = 0 if df is None else len(df)
+        if df is None:
+            return None
 
-        else:
-            raise ValueError("Método inválido. Use 'IQR' ou 'Z-Score'.")
+        if foi_incremental:
+            # Só as linhas novas foram analisadas: o CSV recebe o acréscimo, Excel/PDF exigem a tabela inteira
+            if relatorios.get("csv"):
+                somente_outliers = relatorios.get("somente_outliers")
+                df_tabela = extrair_outliers(df, colunas, linhas_arquivo) if somente_outliers else df
+                caminho_relatorio = os.path.join(caminho_saida, "relatorio_outliers.csv" if somente_outliers else "relatorio.csv")
+                anexar = os.path.isfile(caminho_relatorio)
+                with medir_etapa("exportar_csv", linhas=len(df_tabela)) as etapa:
+                    if anexar:
+                        df_tabela.to_csv(caminho_relatorio, mode="a", header=False, index=False)
+                        print(f"{len(df_tabela)} linhas acrescentadas em: {caminho_relatorio}")
+                        logging.info(f"Relatório CSV incrementado em: {caminho_relatorio}")
+                    else:
+                        exportar_csv(df_tabela, caminho_relatorio)
+                    etapa["bytes"] = os.path.getsize(caminho_relatorio)
+                if somente_outliers and linhas_arquivo is not None:
+                    gravar_indice_outliers(caminho_csv, df_tabela["linha_arquivo"].to_numpy(),
+                                           os.path.join(caminho_saida, "relatorio_outliers_indice.npy"), anexar=anexar)
+            if relatorios.get("excel") or relatorios.get("pdf"):
+                print("Aviso: Excel e PDF só são gerados em execuções completas.")
+            return stats
+    elif not colunas_grupo and Path(caminho_csv).suffix.lower() == ".csv" and os.path.isfile(caminho_csv) and arquivo_grande(caminho_csv):
+        print("Usando pipeline sobreposto (leitura, processamento e escrita em paralelo)...")
+        return executar_pipeline_sobreposto(caminho_csv, caminho_saida, colunas, metodo, relatorios, opcoes_graficos, chave_cache=chave_cache)
+    else:
+        with medir_etapa("carregar", bytes=os.path.getsize(caminho_csv) if os.path.isfile(caminho_csv) else 0) as etapa:
+            df = carregar_arquivo_csv(caminho_csv)
+            etapa["linhas"] = 0 if df is None else len(df)
+        if df is None:
+            return None
 
-        # Marca no DataFrame
-        df_out[f"{coluna}_outlier"] = outliers
+        with medir_etapa("otimizar_tipos", linhas=len(df)) as etapa:
+            df, relatorio_tipos = otimizar_tipos(df, colunas)
+            etapa["memoria_antes_mb"] = relatorio_tipos["memoria_antes_mb"]
+            etapa["memoria_depois_mb"] = relatorio_tipos["memoria_depois_mb"]
+
+        # Mesmo critério de tamanho do processamento: arquivos médios e grandes validam em threads
+        n_workers_validacao = 1 if len(df) < 50_000 else N_CHUNKS
+        with medir_etapa("validar", linhas=len(df), workers=n_workers_validacao):
+            valido, df, relatorio_validacao = validar_estrutura_dados(df, colunas, interromper_em_erro=True, n_workers=n_workers_validacao)
+        print(formatar_relatorio_validacao(relatorio_validacao, relatorio_validacao["problemas"]))
+        logging.info(f"Validação: {json.dumps(relatorio_validacao, default=str)}")
+        if not valido:
+            return None
 
-        # Salva estatísticas
-        quantidade = outliers.sum()
-        percentual = round(quantidade / len(df) * 100, 2)
-        estatisticas_outliers[coluna] = {
-            "quantidade_outliers": int(quantidade),
-            "percentual_outliers": percentual
-        }
+        with medir_etapa("filtrar", linhas=len(df)):
+            df = filtrar_colunas(df, colunas + [col for col in (colunas_grupo or []) if col not in colunas])
+        if df is None:
+            return None
 
-    return df_out, estatisticas_outliers
+        # Limites calculados sobre todas as linhas: cada chunk só aplica a comparação
+        limites = {col: calcular_limites_outliers(df[col], metodo) for col in colunas if col in df.columns}
+        funcao = partial(funcao_processamento_outliers, metodo=metodo, colunas=colunas, limites=limites)
+        contagens_grupo = None
+        with medir_etapa("outliers", linhas=len(df)) as etapa:
+            if colunas_grupo:
+                print(f"Detectando outliers por grupo ({', '.join(colunas_grupo)})...")
+                etapa["modo"] = "grupos"
+                df, estatisticas_outliers, contagens_grupo = detectar_outliers_por_grupo(
+                    df, metodo, colunas, colunas_grupo, n_processos=1 if len(df) < 500_000 else N_CHUNKS
+                )
+                etapa["grupos"] = len(contagens_grupo)
+
+            elif len(df) < 50_000:
+                print("Usando processamento sequencial (arquivo pequeno)...")
+                etapa["modo"] = "sequencial"
+                df = processar_em_threads(df, funcao, n_threads=1)
+
+            elif len(df) < 500_000:
+                print("Usando multithreading (arquivo médio)...")
+                etapa["modo"] = "threads"
+                df = processar_em_threads(df, funcao, n_threads=4)
+
+            else:
+                print("Usando multiprocessing (arquivo grande)...")
+                etapa["modo"] = "processos"
+                df = processar_em_processos(df, funcao, n_chunks=4)
+
+        with medir_etapa("estatisticas", linhas=len(df)):
+            stats = calcular_estatisticas(df)
+
+        if contagens_grupo is not None:
+            for col in colunas:
+                stats.setdefault(col, {})["outliers_por_grupo"] = estatisticas_outliers[col]["por_grupo"]
+            caminho_grupos = os.path.join(caminho_saida, "relatorio_grupos.csv")
+            exportar_csv(contagens_grupo, caminho_grupos, notificar=False)
+
+        if chave_cache:
+            salvar_resultado_cache(chave_cache, df, colunas, stats, limites)
+
+    falhas = exportar_relatorios(df, caminho_saida, relatorios, opcoes_graficos, caminho_csv, linhas_arquivo)
+    if falhas:
+        messagebox.showerror("Erro", f"Falha ao gerar: {', '.join(falhas)}. Veja o log para detalhes.")
+
+    return stats
+
+def _iniciar_inotify(pasta: str) -> int | None:
+    """
+    Abre um descritor inotify que observa arquivos fechados após escrita ou movidos para a pasta.
+    Retorna None fora do Linux ou se o inotify não estiver disponível (o daemon passa a varrer a pasta).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        if libc.inotify_add_watch(fd, os.fsencode(pasta), INOTIFY_CLOSE_WRITE | INOTIFY_MOVED_TO) < 0:
+            erro = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(erro, "inotify_add_watch")
+    except (OSError, AttributeError) as e:
+        logging.warning(f"inotify indisponível, usando varredura periódica: {e}")
+        return None
+    return fd
 
-def calcular_estatisticas(df: pd.DataFrame) -> dict:
+def _eventos_inotify(fd: int, timeout: float) -> List[str] | None:
     """
-    Calcula estatísticas básicas (média, soma, mínimo, máximo, contagem)
-    para cada coluna numérica do DataFrame.
+    Espera até timeout segundos por eventos e devolve os nomes dos arquivos afetados.
+    Retorna None quando a fila do kernel transbordou e eventos foram perdidos (é preciso varrer a pasta).
+    """
+    prontos, _, _ = select.select([fd], [], [], timeout)
+    if not prontos:
+        return []
+    try:
+        dados = os.read(fd, 64 * 1024)
+    except BlockingIOError:
+        return []
+
+    nomes = []
+    posicao = 0
+    while posicao < len(dados):
+        # struct inotify_event: wd, mask, cookie, len, seguido do nome com padding de zeros
+        _, mascara, _, tamanho = struct.unpack_from("iIII", dados, posicao)
+        nome = dados[posicao + 16:posicao + 16 + tamanho].rstrip(b"\0")
+        posicao += 16 + tamanho
+        if mascara & INOTIFY_Q_OVERFLOW:
+            return None
+        if nome:
+            nomes.append(os.fsdecode(nome))
+    return nomes
 
-    Parâmetros:
-        df (pd.DataFrame): DataFrame com os dados filtrados.
+def _assinatura_daemon(caminho: str) -> dict | None:
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
 
-    Retorno:
-        dict: Dicionário contendo as estatísticas por coluna.
+def carregar_estado_daemon(pasta_saida: str) -> dict:
     """
-    estatisticas = {}
-    colunas_numericas = df.select_dtypes(include='number').columns
+    Lê o estado do daemon (arquivos já processados). Entradas de arquivos que não existem mais são descartadas,
+    mantendo o arquivo de estado pequeno.
+    """
+    caminho_estado = os.path.join(pasta_saida, ARQUIVO_ESTADO_DAEMON)
+    if not os.path.isfile(caminho_estado):
+        return {}
+    try:
+        with open(caminho_estado, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Estado do daemon ignorado ({caminho_estado}): {e}")
+        return {}
+    return {caminho: info for caminho, info in estado.get("arquivos", {}).items() if os.path.isfile(caminho)}
+
+def salvar_estado_daemon(pasta_saida: str, arquivos: dict):
+    """
+    Grava o estado do daemon de forma atômica (arquivo temporário + rename).
+    """
+    caminho_estado = os.path.join(pasta_saida, ARQUIVO_ESTADO_DAEMON)
+    caminho_tmp = caminho_estado + ".tmp"
+    with open(caminho_tmp, "w", encoding="utf-8") as f:
+        json.dump({"arquivos": arquivos}, f)
+    os.replace(caminho_tmp, caminho_estado)
+
+def _dialogo_para_log(nivel: int, titulo: str, mensagem: str, **kwargs):
+    logging.log(nivel, f"{titulo}: {mensagem}")
+
+def _iniciar_worker_sem_interface():
+    # Processos de serviço não têm janela: as caixas de diálogo do pipeline viram mensagens de log
+    messagebox.showinfo = partial(_dialogo_para_log, logging.INFO)
+    messagebox.showwarning = partial(_dialogo_para_log, logging.WARNING)
+    messagebox.showerror = partial(_dialogo_para_log, logging.ERROR)
+
+def processar_arquivo_daemon(caminho: str, pasta_saida: str, colunas: List[str], metodo: str, relatorios: dict, opcoes_graficos: dict) -> dict:
+    """
+    Executa o pipeline para um arquivo do daemon. Roda em um processo do pool; os relatórios vão para
+    uma subpasta com o nome do arquivo (ex: vendas.csv -> <saida>/vendas_csv/).
 
-    for coluna in colunas_numericas:
-        dados = df[coluna]
-        estatisticas[coluna] = {
-            'media': dados.mean(),
-            'soma': dados.sum(),
-            'minimo': dados.min(),
-            'maximo': dados.max(),
-            'contagem': dados.count()
-        }
+    Retorno:
+        dict: caminho, status ("ok" ou "erro"), erro e duração em segundos.
+    """
+    pasta_arquivo = os.path.join(pasta_saida, Path(caminho).name.replace(".", "_"))
+    os.makedirs(pasta_arquivo, exist_ok=True)
+    iniciar_medicao(None)  # Sem isso os registros de etapas acumulariam no processo indefinidamente
+    inicio = time.perf_counter()
+    try:
+        stats = executar_pipeline(caminho, pasta_arquivo, colunas, metodo, relatorios, opcoes_graficos)
+        erro = None if stats is not None else "pipeline interrompido (ver log)"
+    except Exception as e:
+        erro = f"{type(e).__name__}: {e}"
+    return {
+        "caminho": caminho,
+        "status": "ok" if erro is None else "erro",
+        "erro": erro,
+        "duracao_s": round(time.perf_counter() - inicio, 3)
+    }
 
-    return estatisticas
+def _metricas_daemon(metricas: dict, concluidos: deque, pendentes: deque, em_andamento: dict, aguardando: dict) -> dict:
+    """
+    Fotografia das métricas do daemon: totais, vazão na janela JANELA_VAZAO_DAEMON e profundidade das filas.
+    """
+    agora = time.time()
+    while concluidos and agora - concluidos[0][0] > JANELA_VAZAO_DAEMON:
+        concluidos.popleft()
+    janela = min(JANELA_VAZAO_DAEMON, max(agora - metricas["inicio"], 1e-9))
+    return {
+        **metricas,
+        "atualizado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "em_execucao_s": round(agora - metricas["inicio"], 1),
+        "profundidade_fila": len(pendentes),
+        "em_andamento": len(em_andamento),
+        "aguardando_estabilidade": len(aguardando),
+        "vazao_arquivos_por_min": round(len(concluidos) * 60 / janela, 2),
+        "vazao_mb_por_s": round(sum(b for _, b in concluidos) / janela / (1024 * 1024), 3)
+    }
 
-def gerar_graficos_pdf(df: pd.DataFrame, opcoes: dict, pasta_saida: str, nome_pdf: str = "relatorio_graficos.pdf"):
+def executar_daemon(pasta_entrada: str, pasta_saida: str, colunas: List[str], metodo: str = "IQR", relatorios: dict = None, opcoes_graficos: dict = None, n_workers: int = None, tamanho_fila: int = TAMANHO_FILA_DAEMON, intervalo: float = INTERVALO_VARREDURA_DAEMON, estabilidade: float = ESTABILIDADE_ARQUIVO_DAEMON, usar_inotify: bool = True, parar: threading.Event = None):
     """
-    Gera gráficos com base nas opções e insere todos em um PDF salvo na pasta de saída.
+    Modo serviço: observa uma pasta e executa o pipeline para cada CSV/XLSX novo ou concluído.
+
+    - Detecção: inotify (arquivo fechado após escrita ou movido para a pasta) com varredura periódica
+      como alternativa. Arquivos vistos só pela varredura precisam ficar `estabilidade` segundos sem
+      mudar de tamanho/mtime antes de entrar na fila.
+    - Pool limitado: no máximo n_workers arquivos em processamento, tamanho_fila prontos na fila e
+      tamanho_fila aguardando estabilidade. Com tudo cheio, novos arquivos não são guardados em memória:
+      ficam na pasta e são retomados por uma nova varredura assim que houver espaço (também com inotify).
+    - Estado: ARQUIVO_ESTADO_DAEMON na pasta de saída guarda tamanho/mtime de cada arquivo concluído;
+      ao reiniciar, arquivos inalterados são pulados. Arquivos com erro só são tentados de novo se mudarem.
+    - Métricas: ARQUIVO_METRICAS_DAEMON na pasta de saída é reescrito a cada INTERVALO_METRICAS_DAEMON
+      segundos com vazão (arquivos/min, MB/s), profundidade da fila e totais.
 
     Parâmetros:
-        df (pd.DataFrame): Dados a serem usados nos gráficos.
-        opcoes (dict): Dicionário com opções de gráfico (ex: {"boxplot": True, "hist": False}).
-        pasta_saida (str): Caminho onde o PDF será salvo.
-        nome_pdf (str): Nome do arquivo PDF de saída.
+        pasta_entrada (str): Pasta observada (não recursiva).
+        pasta_saida (str): Pasta dos relatórios, do estado e das métricas.
+        colunas (List[str]): Colunas a analisar.
+        metodo (str): "IQR" ou "Z-Score".
+        relatorios (dict, opcional): Relatórios por arquivo (padrão: só CSV).
+        opcoes_graficos (dict, opcional): Opções de gráfico para o PDF.
+        n_workers (int, opcional): Processos do pool (padrão: número de CPUs).
+        tamanho_fila (int): Máximo de arquivos prontos aguardando um processo e de arquivos aguardando estabilidade.
+        intervalo (float): Segundos entre varreduras (ou espera máxima por eventos do inotify).
+        estabilidade (float): Segundos sem alteração para considerar um arquivo completo.
+        usar_inotify (bool): False força a varredura periódica.
+        parar (threading.Event, opcional): Encerra o serviço quando sinalizado. Se None, SIGINT/SIGTERM encerram.
 
     Retorno:
-        None
+        dict: Métricas finais.
     """
-    colunas_numericas = df.select_dtypes(include='number').columns
-    pdf_path = os.path.join(pasta_saida, nome_pdf)
+    relatorios = relatorios or {"csv": True}
+    opcoes_graficos = opcoes_graficos or {}
+    n_workers = n_workers or os.cpu_count() or 1
+    pasta_entrada = os.path.abspath(pasta_entrada)
+    os.makedirs(pasta_saida, exist_ok=True)
+    caminho_metricas = os.path.join(pasta_saida, ARQUIVO_METRICAS_DAEMON)
+
+    if parar is None:
+        parar = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for sinal in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sinal, lambda *_: parar.set())
+
+    processados = carregar_estado_daemon(pasta_saida)
+    aguardando = {}     # caminho -> assinatura, visto_em, confirmado (fechado após escrita, via inotify)
+    pendentes = deque()  # (caminho, assinatura) prontos para o pool
+    em_andamento = {}   # futuro -> (caminho, assinatura)
+    concluidos = deque()  # (instante, bytes) dentro da janela de vazão
+    metricas = {"inicio": time.time(), "arquivos_concluidos": 0, "arquivos_com_erro": 0, "bytes_processados": 0,
+                "modo_deteccao": "varredura"}
+
+    fd_inotify = _iniciar_inotify(pasta_entrada) if usar_inotify else None
+    if fd_inotify is not None:
+        metricas["modo_deteccao"] = "inotify"
+    varrer = True  # A primeira varredura recupera o que chegou com o serviço parado
+    transbordou = False  # Algum arquivo ficou de fora com a espera cheia: varrer de novo quando houver espaço
+    ultima_varredura = ultima_metrica = 0.0
+
+    print(f"Daemon observando '{pasta_entrada}' ({metricas['modo_deteccao']}, {n_workers} processos). Ctrl+C encerra.")
+    logging.info(f"Daemon iniciado em {pasta_entrada} ({metricas['modo_deteccao']}, {n_workers} processos).")
+
+    def considerar(caminho: str, confirmado: bool):
+        nonlocal transbordou
+        if Path(caminho).suffix.lower() not in (".csv", ".xlsx") or Path(caminho).name.startswith("."):
+            return
+        if caminho in aguardando or any(caminho == c for c, _ in pendentes) or any(caminho == c for c, _ in em_andamento.values()):
+            return
+        assinatura = _assinatura_daemon(caminho)
+        if assinatura is None:
+            return
+        anterior = processados.get(caminho)
+        if anterior and anterior["tamanho"] == assinatura["tamanho"] and anterior["mtime_ns"] == assinatura["mtime_ns"]:
+            return
+        if len(aguardando) >= tamanho_fila:
+            transbordou = True
+            return
+        aguardando[caminho] = {"assinatura": assinatura, "visto_em": time.monotonic(), "confirmado": confirmado}
 
-    doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-    elementos = []
-    styles = getSampleStyleSheet()
-
-    for coluna in colunas_numericas:
-        if coluna.endswith("_outlier"):
-            continue
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_iniciar_worker_sem_interface) as executor:
+            while not parar.is_set():
+                agora = time.monotonic()
+                if fd_inotify is None and agora - ultima_varredura >= intervalo:
+                    varrer = True
+                if transbordou and len(aguardando) < tamanho_fila and agora - ultima_varredura >= intervalo:
+                    varrer = True
+                if varrer:
+                    transbordou = False
+                    for caminho in listar_shards(pasta_entrada):
+                        considerar(caminho, confirmado=False)
+                    varrer = False
+                    ultima_varredura = agora
+
+                # Arquivos estáveis vão para a fila enquanto houver espaço (backpressure)
+                for caminho, info in list(aguardando.items()):
+                    if len(pendentes) >= tamanho_fila:
+                        break
+                    assinatura = _assinatura_daemon(caminho)
+                    if assinatura is None:
+                        del aguardando[caminho]
+                    elif assinatura != info["assinatura"]:
+                        aguardando[caminho] = {"assinatura": assinatura, "visto_em": agora, "confirmado": False}
+                    elif info["confirmado"] or agora - info["visto_em"] >= estabilidade:
+                        pendentes.append((caminho, assinatura))
+                        del aguardando[caminho]
+
+                for futuro in [f for f in em_andamento if f.done()]:
+                    caminho, assinatura = em_andamento.pop(futuro)
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:  # Processo do pool morreu (ex: falta de memória)
+                        resultado = {"caminho": caminho, "status": "erro", "erro": f"{type(e).__name__}: {e}", "duracao_s": None}
+                    processados[caminho] = {**assinatura, "status": resultado["status"], "erro": resultado["erro"],
+                                            "duracao_s": resultado["duracao_s"], "concluido_em": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                    salvar_estado_daemon(pasta_saida, processados)
+                    if resultado["status"] == "ok":
+                        metricas["arquivos_concluidos"] += 1
+                        metricas["bytes_processados"] += assinatura["tamanho"]
+                        concluidos.append((time.time(), assinatura["tamanho"]))
+                        print(f"Concluído: {caminho} ({resultado['duracao_s']:.2f}s)")
+                        logging.info(f"Daemon: {caminho} processado em {resultado['duracao_s']:.2f}s.")
+                    else:
+                        metricas["arquivos_com_erro"] += 1
+                        print(f"Erro em {caminho}: {resultado['erro']}")
+                        logging.error(f"Daemon: falha em {caminho}: {resultado['erro']}")
+
+                while pendentes and len(em_andamento) < n_workers:
+                    caminho, assinatura = pendentes.popleft()
+                    futuro = executor.submit(processar_arquivo_daemon, caminho, pasta_saida, colunas, metodo, relatorios, opcoes_graficos)
+                    em_andamento[futuro] = (caminho, assinatura)
+
+                if time.monotonic() - ultima_metrica >= INTERVALO_METRICAS_DAEMON:
+                    fotografia = _metricas_daemon(metricas, concluidos, pendentes, em_andamento, aguardando)
+                    with open(caminho_metricas + ".tmp", "w", encoding="utf-8") as f:
+                        json.dump(fotografia, f, indent=2)
+                    os.replace(caminho_metricas + ".tmp", caminho_metricas)
+                    logging.info(f"Daemon: {json.dumps(fotografia)}")
+                    ultima_metrica = time.monotonic()
+
+                # Com trabalho em andamento, acorda com mais frequência para recolher resultados
+                espera = min(intervalo, 0.2) if em_andamento or aguardando or pendentes else intervalo
+                if fd_inotify is None:
+                    parar.wait(espera)
+                else:
+                    nomes = _eventos_inotify(fd_inotify, espera)
+                    if nomes is None:
+                        varrer = True
+                    else:
+                        for nome in nomes:
+                            considerar(os.path.join(pasta_entrada, nome), confirmado=True)
+
+            print("Encerrando: aguardando arquivos em processamento...")
+            for futuro, (caminho, assinatura) in em_andamento.items():
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    resultado = {"status": "erro", "erro": f"{type(e).__name__}: {e}", "duracao_s": None}
+                processados[caminho] = {**assinatura, "status": resultado["status"], "erro": resultado["erro"],
+                                        "duracao_s": resultado["duracao_s"], "concluido_em": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                metricas["arquivos_concluidos" if resultado["status"] == "ok" else "arquivos_com_erro"] += 1
+            em_andamento.clear()
+            salvar_estado_daemon(pasta_saida, processados)
+    finally:
+        if fd_inotify is not None:
+            os.close(fd_inotify)
+
+    fotografia = _metricas_daemon(metricas, concluidos, pendentes, em_andamento, aguardando)
+    with open(caminho_metricas, "w", encoding="utf-8") as f:
+        json.dump(fotografia, f, indent=2)
+    logging.info(f"Daemon encerrado: {json.dumps(fotografia)}")
+    return fotografia
+
+def main_daemon(argumentos: List[str]):
+    """
+    Linha de comando do modo serviço:
+        python thunder_csv.py daemon <pasta_entrada> <pasta_saida> --colunas a,b [--metodo IQR] [--workers 4]
+    """
+    parser = argparse.ArgumentParser(prog="thunder_csv.py daemon", description="Processa continuamente os CSV/XLSX que chegam em uma pasta.")
+    parser.add_argument("pasta_entrada")
+    parser.add_argument("pasta_saida")
+    parser.add_argument("--colunas", required=True, help="Colunas separadas por vírgula")
+    parser.add_argument("--metodo", default="IQR", choices=["IQR", "Z-Score"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--fila", type=int, default=TAMANHO_FILA_DAEMON)
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_VARREDURA_DAEMON)
+    parser.add_argument("--relatorios", default="csv", help="Lista entre csv, excel, pdf e somente_outliers")
+    parser.add_argument("--varredura", action="store_true", help="Não usa inotify")
+    args = parser.parse_args(argumentos)
+
+    configurar_logging()
+    relatorios = {nome.strip(): True for nome in args.relatorios.split(",") if nome.strip()}
+    executar_daemon(args.pasta_entrada, args.pasta_saida, [col.strip() for col in args.colunas.split(",")], args.metodo,
+                    relatorios, {"boxplot": True, "hist": True}, n_workers=args.workers, tamanho_fila=args.fila,
+                    intervalo=args.intervalo, usar_inotify=not args.varredura)
+
+def _json_padrao(valor):
+    # Escalares do numpy nas estatísticas (ex: contagem int64) viram tipos nativos
+    if isinstance(valor, np.integer):
+        return int(valor)
+    return float(valor)
+
+def analisar_para_servico(caminho: str, colunas: List[str], metodo: str, chave: str) -> dict:
+    """
+    Análise executada no pool de processos do serviço HTTP. Consulta o cache de resultados
+    (ver carregar_resultado_cache) e, na falta, valida o arquivo como executar_pipeline
+    (validar_csv_em_fluxo) e o analisa com o backend pandas, que grava as marcações no cache,
+    de onde o arquivo de flags é servido depois.
 
-        elementos.append(Paragraph(f"Gráficos da coluna: {coluna}", styles['Heading2']))
-        elementos.append(Spacer(1, 12))
-
-        if opcoes.get("boxplot"):
-            with NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-                plt.figure()
-                plt.boxplot(df[coluna].dropna(), vert=False, labels=[coluna])
-                plt.title(f"Boxplot - {coluna}")
-                plt.xlabel(coluna)
-                plt.savefig(tmp.name)
-                plt.close()
-                elementos.append(RLImage(tmp.name, width=400, height=300))
-                elementos.append(Spacer(1, 12))
-
-        if opcoes.get("hist"):
-            with NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-                plt.figure()
-                plt.hist(df[coluna].dropna(), bins=10, color="skyblue", edgecolor="black")
-                plt.title(f"Histograma - {coluna}")
-                plt.savefig(tmp.name)
-                plt.close()
-                elementos.append(RLImage(tmp.name, width=400, height=300))
-                elementos.append(Spacer(1, 12))
-
-        if opcoes.get("bar") and df[coluna].nunique() <= 20:
-            with NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-                plt.figure()
-                df[coluna].value_counts().sort_index().plot(kind="bar", color="lightgreen", edgecolor="black")
-                plt.title(f"Gráfico de Barras - {coluna}")
-                plt.tight_layout()
-                plt.savefig(tmp.name)
-                plt.close()
-                elementos.append(RLImage(tmp.name, width=400, height=300))
-                elementos.append(Spacer(1, 12))
-
-    doc.build(elementos)
-    print(f"PDF com gráficos salvo em: {pdf_path}")
-
-def exportar_excel(df: pd.DataFrame, caminho: str):
+    Retorno:
+        dict: {"linhas", "limites", "estatisticas", "outliers", "cache"} serializável em JSON.
 
+    Exceções:
+        ValueError: O arquivo não passou na validação (o serviço responde 422).
     """
-    Exporta um DataFrame como arquivo Excel (.xlsx) para o caminho fornecido.
-    Inclui mensagens de sucesso ou erro e logging.
-    """
+    resultado = carregar_resultado_cache(chave)
+    if resultado is not None:
+        outliers = {
+            col: {
+                "quantidade_outliers": int(flags.sum()),
+                "percentual_outliers": round(int(flags.sum()) / len(flags) * 100, 2) if len(flags) > 0 else 0.0
+            }
+            for col, flags in resultado["flags"].items()
+        }
+        return {"linhas": resultado["linhas"], "limites": resultado["limites"], "estatisticas": resultado["estatisticas"],
+                "outliers": outliers, "cache": True}
 
-    try:
-        df.to_excel(caminho, index=False)
-        print(f"Excel salvo em: {caminho}")
-        logging.info(f"Relatório Excel exportado para: {caminho}")
-        messagebox.showinfo("Sucesso", "Excel salvo com sucesso!")
-        
-    except Exception as e:
-        logging.error(f"Erro ao exportar Excel: {e}")
-        messagebox.showerror("Erro", f"Erro ao salvar Excel: {e}")
+    relatorio_validacao = validar_csv_em_fluxo(caminho, colunas, LINHAS_POR_CHUNK_FLUXO, interromper_em_erro=True)
+    if not relatorio_validacao["valido"]:
+        raise ValueError("Validação falhou: " + " ".join(relatorio_validacao["problemas"]))
 
-def exportar_csv(df: pd.DataFrame, caminho: str):
+    resultado = BACKENDS["pandas"](caminho, colunas, metodo, chave_cache=chave)
+    resposta = {**resultado, "limites": {col: [float(inf), float(sup)] for col, (inf, sup) in resultado["limites"].items()},
+                "cache": False}
+    return json.loads(json.dumps(resposta, default=_json_padrao))
 
+def flags_csv_do_cache(chave: str) -> bytes | None:
     """
-    Exporta um DataFrame como arquivo CSV para o caminho fornecido.
-    Inclui mensagens de sucesso ou erro e logging.
+    Monta o arquivo de flags (uma coluna <coluna>_outlier com 0/1 por linha) a partir do cache.
     """
+    resultado = carregar_resultado_cache(chave)
+    if resultado is None:
+        return None
+    df = pd.DataFrame({f"{col}_outlier": flags.astype(np.uint8) for col, flags in resultado["flags"].items()})
+    return df.to_csv(index=False).encode("utf-8")
 
-    try:
-        df.to_csv(caminho, index=False)
-        print(f"CSV salvo em: {caminho}")
-        logging.info(f"Relatório CSV exportado para: {caminho}")
-        messagebox.showinfo("Sucesso", "CSV salvo com sucesso!")
-    except Exception as e:
-        logging.error(f"Erro ao exportar CSV: {e}")
-        messagebox.showerror("Erro", f"Erro ao salvar CSV: {e}")
+async def _ler_requisicao_http(reader: asyncio.StreamReader) -> Tuple[str, str, dict, dict] | None:
+    """
+    Lê a linha de requisição e os cabeçalhos. O corpo fica no reader para ser consumido em fluxo.
 
-def dividir_em_chunks(df: pd.DataFrame, n_chunks: int) -> List[pd.DataFrame]:
-    return np.array_split(df, n_chunks)
+    Retorno:
+        (metodo, caminho, parametros da query, cabeçalhos em minúsculas) ou None se a conexão foi fechada.
+    """
+    try:
+        bruto = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    linhas = bruto.decode("latin-1").split("\r\n")
+    metodo_http, alvo, _ = linhas[0].split(" ", 2)
+    cabecalhos = {}
+    for linha in linhas[1:]:
+        if ":" in linha:
+            nome, valor = linha.split(":", 1)
+            cabecalhos[nome.strip().lower()] = valor.strip()
+    url = urllib.parse.urlsplit(alvo)
+    parametros = {nome: valores[-1] for nome, valores in urllib.parse.parse_qs(url.query).items()}
+    return metodo_http.upper(), url.path, parametros, cabecalhos
+
+class CorpoMuitoGrande(ValueError):
+    """Corpo da requisição acima do limite de upload do serviço."""
+
+async def _blocos_do_corpo(reader: asyncio.StreamReader, cabecalhos: dict, limite_bytes: int):
+    """
+    Gera o corpo da requisição em blocos, com Content-Length ou Transfer-Encoding: chunked.
+    Lança CorpoMuitoGrande se o corpo passar de limite_bytes.
+    """
+    total = 0
+    if cabecalhos.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            tamanho = int((await reader.readline()).split(b";")[0].strip(), 16)
+            if tamanho == 0:
+                await reader.readline()
+                return
+            total += tamanho
+            if total > limite_bytes:
+                raise CorpoMuitoGrande(f"Corpo maior que o limite de {limite_bytes // (1024 * 1024)} MB.")
+            yield await reader.readexactly(tamanho)
+            await reader.readline()
+    else:
+        restante = int(cabecalhos.get("content-length", 0))
+        if restante > limite_bytes:
+            raise CorpoMuitoGrande(f"Corpo maior que o limite de {limite_bytes // (1024 * 1024)} MB.")
+        while restante > 0:
+            bloco = await reader.read(min(restante, 1024 * 1024))
+            if not bloco:
+                raise asyncio.IncompleteReadError(b"", restante)
+            restante -= len(bloco)
+            yield bloco
+
+async def _escrever_resposta_http(writer: asyncio.StreamWriter, status: int, corpo, tipo: str = "application/json"):
+    if not isinstance(corpo, bytes):
+        corpo = json.dumps(corpo, ensure_ascii=False, default=_json_padrao).encode("utf-8")
+    motivo = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+              422: "Unprocessable Entity", 500: "Internal Server Error"}.get(status, "")
+    writer.write(f"HTTP/1.1 {status} {motivo}\r\nContent-Type: {tipo}\r\nContent-Length: {len(corpo)}\r\n\r\n".encode("latin-1") + corpo)
+    await writer.drain()
+
+async def _servico_http(host: str, porta: int, n_workers: int, limite_upload_mb: float):
+    """
+    Laço principal do serviço HTTP (ver executar_servico).
+    """
+    executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_iniciar_worker_sem_interface)
+    loop = asyncio.get_running_loop()
+    em_andamento = {}  # chave -> asyncio.Future compartilhado por requisições idênticas simultâneas
+    recentes = OrderedDict()  # chave -> resposta, LRU em memória na frente do cache em disco
+    metricas = {"requisicoes": 0, "analises": 0, "deduplicadas": 0, "acertos_memoria": 0, "acertos_disco": 0, "erros": 0}
+
+    async def analisar(caminho: str, colunas: List[str], metodo: str, chave: str, pasta_temporaria: str = None) -> dict:
+        try:
+            if chave in recentes:
+                recentes.move_to_end(chave)
+                metricas["acertos_memoria"] += 1
+                return recentes[chave]
+            if chave in em_andamento:
+                metricas["deduplicadas"] += 1
+                return await asyncio.shield(em_andamento[chave])
+            return await executar_analise(caminho, colunas, metodo, chave)
+        finally:
+            if pasta_temporaria:
+                shutil.rmtree(pasta_temporaria, ignore_errors=True)
+
+    async def executar_analise(caminho: str, colunas: List[str], metodo: str, chave: str) -> dict:
+        futuro = loop.create_future()
+        em_andamento[chave] = futuro
+        try:
+            resposta = await loop.run_in_executor(executor, analisar_para_servico, caminho, colunas, metodo, chave)
+            metricas["analises"] += 1
+            metricas["acertos_disco"] += resposta["cache"]
+            resposta = {**resposta, "chave": chave, "flags": f"/flags/{chave}"}
+            recentes[chave] = resposta
+            if len(recentes) > TAMANHO_CACHE_MEMORIA_SERVICO:
+                recentes.popitem(last=False)
+            futuro.set_result(resposta)
+            return resposta
+        except Exception as e:
+            futuro.set_exception(e)
+            futuro.exception()  # Evita o aviso de exceção não recuperada quando ninguém mais espera
+            raise
+        finally:
+            del em_andamento[chave]
+
+    async def receber_upload(reader, cabecalhos) -> Tuple[str, str, str]:
+        # Grava o corpo em disco calculando o hash no caminho, sem manter o arquivo na memória
+        pasta_temporaria = tempfile.mkdtemp(prefix="thundercsv_upload_")
+        caminho = os.path.join(pasta_temporaria, "upload.csv")
+        h = hashlib.blake2b(digest_size=20)  # Mesmo hash de impressao_digital_arquivo
+        try:
+            with open(caminho, "wb") as f:
+                async for bloco in _blocos_do_corpo(reader, cabecalhos, int(limite_upload_mb * 1024 * 1024)):
+                    h.update(bloco)
+                    f.write(bloco)
+        except BaseException:
+            shutil.rmtree(pasta_temporaria, ignore_errors=True)
+            raise
+        return caminho, h.hexdigest(), pasta_temporaria
+
+    async def atender(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while (requisicao := await _ler_requisicao_http(reader)) is not None:
+                metodo_http, rota, parametros, cabecalhos = requisicao
+                metricas["requisicoes"] += 1
+                status, corpo, tipo = 200, None, "application/json"
+                try:
+                    if metodo_http == "GET" and rota == "/saude":
+                        corpo = {"status": "ok"}
+                    elif metodo_http == "GET" and rota == "/metricas":
+                        corpo = {**metricas, "em_andamento": len(em_andamento), "cache_memoria": len(recentes)}
+                    elif metodo_http == "GET" and rota.startswith("/flags/"):
+                        conteudo = await loop.run_in_executor(None, flags_csv_do_cache, rota.rsplit("/", 1)[-1])
+                        if conteudo is None:
+                            status, corpo = 404, {"erro": "Resultado não encontrado no cache."}
+                        else:
+                            corpo, tipo = conteudo, "text/csv"
+                    elif rota == "/analisar" and metodo_http == "POST":
+                        upload = not cabecalhos.get("content-type", "").startswith("application/json")
+                        if upload:
+                            # Upload em fluxo: colunas e método vêm na query (?colunas=a,b&metodo=IQR)
+                            pedido = parametros
+                        else:
+                            pedido = json.loads(b"".join([b async for b in _blocos_do_corpo(reader, cabecalhos, 1024 * 1024)]))
+                        colunas, metodo = pedido.get("colunas"), pedido.get("metodo", "IQR")
+                        if isinstance(colunas, str):
+                            colunas = [col for col in colunas.split(",") if col]
+                        if not colunas or metodo not in PARAMETROS_METODOS:
+                            # Respondido sem ler o upload: a conexão não pode ser reaproveitada
+                            cabecalhos["connection"] = "close"
+                            raise ValueError("Informe 'colunas' e um 'metodo' entre IQR e Z-Score.")
+
+                        if upload:
+                            caminho, impressao, pasta_temporaria = await receber_upload(reader, cabecalhos)
+                        else:
+                            caminho, pasta_temporaria = pedido.get("caminho"), None
+                            if not caminho or not os.path.isfile(caminho):
+                                raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+                            impressao = await loop.run_in_executor(None, impressao_digital_arquivo, caminho)
+                        corpo = await analisar(caminho, colunas, metodo, chave_cache_resultados(impressao, colunas, metodo, "servico"), pasta_temporaria)
+                    elif rota in ("/analisar", "/saude", "/metricas") or rota.startswith("/flags/"):
+                        status, corpo = 405, {"erro": "Método não permitido."}
+                    else:
+                        status, corpo = 404, {"erro": "Rota inexistente."}
+                except FileNotFoundError as e:
+                    status, corpo = 404, {"erro": str(e)}
+                except json.JSONDecodeError as e:
+                    status, corpo = 400, {"erro": f"JSON inválido: {e}"}
+                except CorpoMuitoGrande as e:
+                    status, corpo = 413, {"erro": str(e)}
+                except ValueError as e:
+                    # Inclui colunas ausentes no arquivo (pd.read_csv)
+                    status, corpo = 422, {"erro": str(e)}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except Exception as e:
+                    logging.exception("Erro no serviço HTTP")
+                    status, corpo = 500, {"erro": f"{type(e).__name__}: {e}"}
+                if status >= 400:
+                    metricas["erros"] += 1
+                await _escrever_resposta_http(writer, status, corpo, tipo)
+                if cabecalhos.get("connection", "").lower() == "close" or status == 413:
+                    return
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    servidor = await asyncio.start_server(atender, host, porta, limit=64 * 1024)
+    print(f"Serviço ThunderCSV em http://{host}:{porta} ({n_workers} processos). Ctrl+C encerra.")
+    logging.info(f"Serviço HTTP iniciado em {host}:{porta}.")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-def processar_chunk(chunk: pd.DataFrame, metodo: str, colunas: list) -> pd.DataFrame:
-    chunk, _ = detectar_outliers(chunk, metodo, colunas)
-    return chunk
+def executar_servico(host: str = "127.0.0.1", porta: int = PORTA_SERVICO, n_workers: int = None, limite_upload_mb: float = LIMITE_UPLOAD_SERVICO_MB):
+    """
+    Serviço HTTP local para chamar a análise de outliers/estatísticas de outras ferramentas.
+    Só aceita endereços de loopback.
 
-def processar_em_threads(df: pd.DataFrame, funcao_processamento, n_threads=4):
-    chunks = dividir_em_chunks(df, n_threads)
-    with ThreadPoolExecutor(max_workers=n_threads) as executor:
-        resultados = list(executor.map(funcao_processamento, chunks))
-    return pd.concat(resultados)
+    Rotas:
+        POST /analisar  JSON {"caminho": "...", "colunas": ["a", "b"], "metodo": "IQR"}
+                        ou o CSV no corpo (Content-Length ou chunked) com ?colunas=a,b&metodo=IQR.
+                        Responde {"linhas", "limites", "estatisticas", "outliers", "cache", "chave", "flags"}.
+        GET /flags/<chave>  CSV com as colunas <coluna>_outlier (0/1), na ordem das linhas do arquivo.
+        GET /metricas, GET /saude
 
-def processar_em_processos(df: pd.DataFrame, funcao_processamento, n_chunks=4):
-    chunks = dividir_em_chunks(df, n_chunks)
-    with ProcessPoolExecutor(max_workers=n_chunks) as executor:
-        resultados = list(executor.map(funcao_processamento, chunks))
-    return pd.concat(resultados)
+    Requisições com o mesmo conteúdo, colunas e método compartilham uma única análise enquanto ela
+    está em andamento; os resultados ficam no cache em disco (chave_cache_resultados) e nos últimos
+    TAMANHO_CACHE_MEMORIA_SERVICO em memória. As análises rodam em um pool de processos compartilhado.
 
-def funcao_processamento_outliers(chunk: pd.DataFrame, metodo: str, colunas: list) -> pd.DataFrame:
-    return detectar_outliers(chunk, metodo, colunas)[0]
+    Parâmetros:
+        host (str): Endereço de loopback (ex: "127.0.0.1", "::1").
+        porta (int): Porta TCP.
+        n_workers (int, opcional): Processos do pool (padrão: número de CPUs).
+        limite_upload_mb (float): Tamanho máximo de um upload.
+    """
+    if not ipaddress.ip_address(host).is_loopback:
+        raise ValueError(f"O serviço só pode escutar em loopback, não em '{host}'.")
+    try:
+        asyncio.run(_servico_http(host, porta, n_workers or os.cpu_count() or 1, limite_upload_mb))
+    except KeyboardInterrupt:
+        print("Serviço encerrado.")
 
 def iniciar_processamento():
 
@@ -472,9 +3414,10 @@ def iniciar_processamento():
     - Aplica o método de detecção de outliers selecionado.
     - Calcula estatísticas descritivas e gera relatórios em CSV, Excel e PDF.
     - Registra logs e exibe mensagens de conclusão ou erro.
+    - Opcionalmente mede cada etapa (JSON lines) e grava um perfil cProfile.
     """
 
-    global entry_1, var_csv, var_excel, var_pdf, var_boxplot, var_histograma, var_barras, var_logging, metodo_outlier
+    global entry_1, entry_grupo, var_csv, var_excel, var_pdf, var_boxplot, var_histograma, var_barras, var_logging, var_incremental, var_metricas, var_perfil, var_lote, var_previa, var_somente_outliers, metodo_outlier
     global caminho_arquivo_csv, caminho_diretorio_saida
 
     caminho_csv = caminho_arquivo_csv
@@ -485,7 +3428,14 @@ def iniciar_processamento():
         return
     
     colunas = entry_1.get().split(",")
+    colunas_grupo = [col.strip() for col in entry_grupo.get().split(",") if col.strip()]
     metodo = metodo_outlier.get()
+    relatorios = {
+        "csv": var_csv.get(),
+        "excel": var_excel.get(),
+        "pdf": var_pdf.get(),
+        "somente_outliers": var_somente_outliers.get()
+    }
     opcoes_graficos = {
         "boxplot": var_boxplot.get(),
         "hist": var_histograma.get(),
@@ -496,46 +3446,42 @@ def iniciar_processamento():
         configurar_logging()
         logging.info("Execução iniciada.")
 
-    df = carregar_arquivo_csv(caminho_csv)
-    if df is None:
-        return
-
-    valido, df = validar_estrutura_dados(df, colunas, interromper_em_erro=True)
-    if not valido:
-        return
+    iniciar_medicao(os.path.join(caminho_saida, ARQUIVO_METRICAS) if var_metricas.get() else None)
+    perfil = cProfile.Profile() if var_perfil.get() else None
+    if perfil:
+        perfil.enable()
 
-    df = filtrar_colunas(df, colunas)
-    if df is None:
+    try:
+        if var_previa.get():
+            previa, amostra = gerar_previa(caminho_csv, colunas, metodo)
+            caminho_png = gerar_grafico_previa(previa, amostra, caminho_saida)
+            print(formatar_previa(previa))
+            messagebox.showinfo("Prévia", formatar_previa(previa) + f"\n\nGráficos em: {caminho_png}")
+            return
+        if var_lote.get():
+            # Modo lote: todos os arquivos da pasta do arquivo selecionado
+            stats = processar_lote(os.path.dirname(caminho_csv), caminho_saida, colunas, metodo,
+                                   relatorios=relatorios, opcoes_graficos=opcoes_graficos)
+        else:
+            stats = executar_pipeline(caminho_csv, caminho_saida, colunas, metodo, relatorios, opcoes_graficos,
+                                      incremental=var_incremental.get(), colunas_grupo=colunas_grupo or None)
+    finally:
+        if perfil:
+            perfil.disable()
+            caminho_perfil = os.path.join(caminho_saida, ARQUIVO_PERFIL)
+            perfil.dump_stats(caminho_perfil)
+            print(f"Perfil cProfile salvo em: {caminho_perfil}")
+
+    if stats is None:
         return
 
-    n_linhas = len(df)
-
-    if len(df) < 50_000:
-        print("Usando processamento sequencial (arquivo pequeno)...")
-        df = processar_em_threads(df, partial(funcao_processamento_outliers, metodo=metodo, colunas=colunas), n_threads=1)
-
-    elif len(df) < 500_000:
-        print("Usando multithreading (arquivo médio)...")
-        df = processar_em_threads(df, partial(funcao_processamento_outliers, metodo=metodo, colunas=colunas), n_threads=4)
-
-    else:
-        print("Usando multiprocessing (arquivo grande)...")
-        df = processar_em_processos(df, partial(funcao_processamento_outliers, metodo=metodo, colunas=colunas), n_chunks=4)
-
-    stats = calcular_estatisticas(df)
-
-    if var_csv.get():
-        exportar_csv(df, os.path.join(caminho_saida, "relatorio.csv"))
-    if var_excel.get():
-        exportar_excel(df, os.path.join(caminho_saida, "relatorio.xlsx"))
-    if var_pdf.get():
-        gerar_graficos_pdf(df, opcoes_graficos, caminho_saida)
-
     messagebox.showinfo("Concluído", "Processamento finalizado com sucesso!")
+    if var_metricas.get():
+        messagebox.showinfo("Tempos por etapa", resumo_tempos())
     logging.info("Processamento finalizado.")
 
 def iniciar_interface():
-    global entry_1, var_csv, var_excel, var_pdf, var_boxplot, var_histograma, var_barras, var_logging
+    global entry_1, entry_grupo, var_csv, var_excel, var_pdf, var_boxplot, var_histograma, var_barras, var_logging, var_incremental, var_metricas, var_perfil, var_lote, var_previa, var_somente_outliers
 
     OUTPUT_PATH = Path(__file__).parent
     ASSETS_PATH = OUTPUT_PATH / "build" / "assets" / "frame0"
@@ -727,6 +3673,29 @@ def iniciar_interface():
     )
     radio_z.place(x=100, y=269)
 
+    # Colunas de grupo (opcional): limites de outlier por valor dessas colunas
+    canvas.create_text(
+        200.0,
+        272.0,
+        anchor="nw",
+        text="Agrupar por",
+        fill="#E1E6ED",
+        font=("Jersey 10", 14 * -1)
+    )
+    entry_grupo = Entry(
+        bd=0,
+        bg="#CCCCCC",
+        fg="#000716",
+        highlightthickness=0,
+        font=("Jersey 20", 15 * -1)
+    )
+    entry_grupo.place(
+        x=280.0,
+        y=271.0,
+        width=130.0,
+        height=18.0
+    )
+
     # Tipos de relatórios
     canvas.create_text(
         24.0,
@@ -800,6 +3769,27 @@ def iniciar_interface():
     )
     checkbox_pdf.place(x=208, y=340)
 
+    canvas.create_text(
+        346.0,
+        343.0,
+        anchor="nw",
+        text="Só outliers",
+        fill="#E1E6ED",
+        font=("Jersey 10", 16 * -1)
+    )
+    var_somente_outliers = tk.BooleanVar(value=False)
+    checkbox_somente_outliers = tk.Checkbutton(
+        root,
+        variable=var_somente_outliers,
+        onvalue=True,
+        offvalue=False,
+        bg="#1E1E1E",
+        activebackground="#1E1E1E",
+        highlightthickness=0,
+        relief="flat"
+    )
+    checkbox_somente_outliers.place(x=320, y=340)
+
     # Gerar gráficos
     canvas.create_text(
         24.0,
@@ -894,6 +3884,116 @@ def iniciar_interface():
         relief="flat"
     )
     checkbox_logging.place(x=429, y=314)
+
+    # Modo incremental (arquivos que só crescem)
+    canvas.create_text(
+        455.0,
+        292.0,
+        anchor="nw",
+        text="Modo incremental (só linhas novas)",
+        fill="#E1E6ED",
+        font=("Jersey 10", 14 * -1)
+    )
+    var_incremental = tk.BooleanVar(value=False)
+    checkbox_incremental = tk.Checkbutton(
+        root,
+        variable=var_incremental,
+        onvalue=True,
+        offvalue=False,
+        bg="#1E1E1E",
+        activebackground="#1E1E1E",
+        highlightthickness=0,
+        relief="flat"
+    )
+    checkbox_incremental.place(x=429, y=288)
+
+    # Medição por etapa (JSON lines + resumo de tempos)
+    canvas.create_text(
+        455.0,
+        266.0,
+        anchor="nw",
+        text="Medir tempos por etapa",
+        fill="#E1E6ED",
+        font=("Jersey 10", 14 * -1)
+    )
+    var_metricas = tk.BooleanVar(value=False)
+    checkbox_metricas = tk.Checkbutton(
+        root,
+        variable=var_metricas,
+        onvalue=True,
+        offvalue=False,
+        bg="#1E1E1E",
+        activebackground="#1E1E1E",
+        highlightthickness=0,
+        relief="flat"
+    )
+    checkbox_metricas.place(x=429, y=262)
+
+    # Perfil cProfile (abrir com snakeviz ou pstats)
+    canvas.create_text(
+        455.0,
+        240.0,
+        anchor="nw",
+        text="Gerar perfil cProfile (.prof)",
+        fill="#E1E6ED",
+        font=("Jersey 10", 14 * -1)
+    )
+    var_perfil = tk.BooleanVar(value=False)
+    checkbox_perfil = tk.Checkbutton(
+        root,
+        variable=var_perfil,
+        onvalue=True,
+        offvalue=False,
+        bg="#1E1E1E",
+        activebackground="#1E1E1E",
+        highlightthickness=0,
+        relief="flat"
+    )
+    checkbox_perfil.place(x=429, y=236)
+
+    # Modo lote: processa todos os arquivos da pasta do arquivo selecionado
+    canvas.create_text(
+        455.0,
+        214.0,
+        anchor="nw",
+        text="Lote: todos os arquivos da pasta",
+        fill="#E1E6ED",
+        font=("Jersey 10", 14 * -1)
+    )
+    var_lote = tk.BooleanVar(value=False)
+    checkbox_lote = tk.Checkbutton(
+        root,
+        variable=var_lote,
+        onvalue=True,
+        offvalue=False,
+        bg="#1E1E1E",
+        activebackground="#1E1E1E",
+        highlightthickness=0,
+        relief="flat"
+    )
+    checkbox_lote.place(x=429, y=210)
+
+    # Prévia: analisa só uma amostra do arquivo, em poucos segundos
+    canvas.create_text(
+        455.0,
+        188.0,
+        anchor="nw",
+        text="Prévia rápida (amostra)",
+        fill="#E1E6ED",
+        font=("Jersey 10", 14 * -1)
+    )
+    var_previa = tk.BooleanVar(value=False)
+    checkbox_previa = tk.Checkbutton(
+        root,
+        variable=var_previa,
+        onvalue=True,
+        offvalue=False,
+        bg="#1E1E1E",
+        activebackground="#1E1E1E",
+        highlightthickness=0,
+        relief="flat"
+    )
+    checkbox_previa.place(x=429, y=184)
     
     # Iniciar processamento
     button_image_2 = PhotoImage(
@@ -942,4 +4042,11 @@ def iniciar_interface():
     root.mainloop()
 
 if __name__ == "__main__":
-    iniciar_interface()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "daemon":
+        main_daemon(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "servico":
+        # python thunder_csv.py servico [porta] [processos]
+        executar_servico(porta=int(sys.argv[2]) if len(sys.argv) > 2 else PORTA_SERVICO,
+                         n_workers=int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    else:
+        iniciar_interface()
\ No newline at end of file